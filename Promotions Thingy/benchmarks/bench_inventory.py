@@ -0,0 +1,47 @@
+import os
+import sys
+import time
+from datetime import datetime
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_inventory
+from utils.inventory_utils import filter_valid_ingredients, parse_quantity, standardize_quantity
+
+SIZES = [10_000, 100_000, 1_000_000]
+
+# The per-row implementation this benchmark replaces, kept for comparison
+def legacy_filter_valid_ingredients(inventory_df):
+    today = datetime.now()
+    inventory_df['Expiry Date'] = pd.to_datetime(inventory_df['Expiry Date'], dayfirst=True)
+    parsed = inventory_df['Quantity'].apply(parse_quantity)
+    inventory_df['value'] = parsed.apply(lambda x: x[0])
+    inventory_df['unit'] = parsed.apply(lambda x: x[1])
+    inventory_df['standardized_quantity'] = inventory_df.apply(
+        lambda row: standardize_quantity(row['value'], row['unit']), axis=1)
+    valid_df = inventory_df[(inventory_df['Expiry Date'] > today) & (inventory_df['standardized_quantity'] > 0)]
+    return valid_df['Ingredient'].str.lower().tolist()
+
+def time_call(fn, df):
+    start = time.perf_counter()
+    result = fn(df.copy())
+    return time.perf_counter() - start, result
+
+def main(include_legacy='--legacy' in sys.argv):
+    print(f"{'rows':>10} {'impl':>10} {'seconds':>10} {'rows/s':>14}")
+    for rows in SIZES:
+        df = make_inventory(rows)
+        impls = [('vectorized', filter_valid_ingredients)]
+        if include_legacy:
+            impls.append(('legacy', legacy_filter_valid_ingredients))
+        results = {}
+        for name, fn in impls:
+            elapsed, results[name] = time_call(fn, df)
+            print(f"{rows:>10} {name:>10} {elapsed:>10.3f} {rows / elapsed:>14,.0f}")
+        if len(results) > 1 and results['vectorized'] != results['legacy']:
+            print("  !! vectorized and legacy results differ")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fakes import FakeGenerativeModel
+from utils.scoring import TokenBucket, score_campaigns
+
+CAMPAIGNS = 200
+
+# Sequential loop the Admin Panel used before: one call, then a fixed sleep
+def score_sequentially(model, jobs, delay=0.5):
+    for key, text in jobs:
+        model.generate_content(text)
+        time.sleep(delay)
+
+def main(latency=0.2, error_rate=0.05):
+    jobs = [(str(i), f"Campaign {i}: two pizzas for the price of one") for i in range(CAMPAIGNS)]
+    print(f"{CAMPAIGNS} campaigns, fake latency {latency}s, error rate {error_rate:.0%}")
+
+    for workers, rpm, budget in [(1, 6000, 0), (8, 1200, 0), (16, 2400, 0), (8, 1200, 6000)]:
+        model = FakeGenerativeModel(latency=latency, error_rate=error_rate, seed=1)
+        start = time.perf_counter()
+        failed = sum(error is not None for _, _, error in score_campaigns(
+            model, jobs, max_workers=workers, limiter=TokenBucket(rpm), batch_token_budget=budget))
+        elapsed = time.perf_counter() - start
+        print(f"workers={workers:>3} rpm={rpm:>5} batch_budget={budget:>5} {elapsed:7.2f}s  "
+              f"{CAMPAIGNS / elapsed:6.1f}/s  calls={model.calls} failed={failed}")
+
+    if '--sequential' in sys.argv:
+        start = time.perf_counter()
+        score_sequentially(FakeGenerativeModel(latency=latency), jobs)
+        print(f"sequential + 0.5s sleep {time.perf_counter() - start:7.2f}s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("LLM_CACHE_DISABLED", "1")
+
+PAGE = os.path.join(ROOT, "pages", "campaign_portal.py")
+RERUNS = 5
+
+# Time-to-first-paint of the portal page: a cold run in a fresh process
+# (imports, client setup, first render) followed by plain reruns. Firestore
+# and Gemini are replaced by the in-memory fakes.
+def main():
+    start = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+
+    import utils.firebase
+    import utils.gemini
+    from benchmarks.fakes import FakeFirestore, FakeGenerativeModel
+    imports = time.perf_counter() - start
+
+    db = FakeFirestore()
+    month = datetime.now().strftime("%Y-%m")
+    for i in range(50):
+        data = {"name": f"Staff {i}", "month": month, "campaign": "Two pizzas for one", "promotion_type": "Buy 1 Get 1",
+                "goal": "Reduce Food Wastage"}
+        if i % 2:
+            data["ai_score"] = round(5 + i % 50 / 10, 1)
+        db.collection("staff_campaigns").document(f"Staff {i}_{month}").set(data)
+    utils.firebase._db = db
+    utils.gemini._model = FakeGenerativeModel(latency=0)
+
+    app = AppTest.from_file(PAGE, default_timeout=60)
+    start = time.perf_counter()
+    app.run()
+    first = time.perf_counter() - start
+    if app.exception:
+        raise SystemExit(f"page raised: {app.exception[0].message}")
+
+    reruns = []
+    for _ in range(RERUNS):
+        start = time.perf_counter()
+        app.run()
+        reruns.append(time.perf_counter() - start)
+
+    print(f"imports (streamlit, utils)  {imports * 1000:8.1f} ms")
+    print(f"first run                   {first * 1000:8.1f} ms")
+    print(f"rerun (median of {RERUNS})        {statistics.median(reruns) * 1000:8.1f} ms")
+    # streamlit itself imports plotly.graph_objects for its chart theme; the
+    # page's own charts are what pull in plotly.express
+    print(f"modules loaded: plotly.express={'plotly.express' in sys.modules} "
+          f"google.generativeai={'google.generativeai' in sys.modules}")
+
+if __name__ == "__main__":
+    main()
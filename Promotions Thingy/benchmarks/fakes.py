@@ -0,0 +1,392 @@
+import copy
+import hashlib
+import json
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from firebase_admin import firestore
+from google.api_core.exceptions import AlreadyExists, NotFound
+
+# Local stand-ins for external services, for the benchmarks and tests.
+
+# API error carrying an HTTP status code, like google.api_core exceptions
+class FakeApiError(Exception):
+    def __init__(self, code, message=""):
+        super().__init__(f"{code} {message}".strip())
+        self.code = code
+
+class FakeResponse:
+    def __init__(self, text, usage_metadata=None):
+        self.text = text
+        self.usage_metadata = usage_metadata
+
+# Usage metadata with token counts estimated at ~4 characters per token
+def fake_usage(prompt, text):
+    return SimpleNamespace(prompt_token_count=len(prompt) // 4 + 1, candidates_token_count=len(text) // 4 + 1)
+
+# GenerativeModel stand-in with configurable latency and failure rate.
+# error_rate is the chance a call fails; rate_limit_share of those
+# failures are 429s and the rest 503s. drop_rate is the chance each
+# campaign in a batched scoring request is left out of the response.
+class FakeGenerativeModel:
+    def __init__(self, latency=0.05, error_rate=0.0, rate_limit_share=0.5, seed=None,
+                 model_name="models/fake-gemini", drop_rate=0.0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self.rate_limit_share = rate_limit_share
+        self.model_name = model_name
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _roll(self):
+        with self._lock:
+            self.calls += 1
+            return self._random.random(), self._random.random()
+
+    def generate_content(self, prompt, generation_config=None, stream=False, **kwargs):
+        fail, kind = self._roll()
+        time.sleep(self.latency)
+        if fail < self.error_rate:
+            raise FakeApiError(429 if kind < self.rate_limit_share else 503, "fake failure")
+        text = self.respond(prompt, generation_config)
+        usage = fake_usage(prompt, text)
+        return self._stream(text, usage) if stream else FakeResponse(text, usage)
+
+    # Streamed response: a chunk every few words, with latency spread across them
+    # and the usage metadata on the last chunk
+    def _stream(self, text, usage, words_per_chunk=5):
+        words = text.split(" ")
+        chunks = [" ".join(words[i:i + words_per_chunk]) for i in range(0, len(words), words_per_chunk)]
+        for position, chunk in enumerate(chunks):
+            time.sleep(self.latency / len(chunks))
+            last = position == len(chunks) - 1
+            yield FakeResponse(chunk if last else chunk + " ", usage if last else None)
+
+    # Deterministic score in [1, 10] derived from some text
+    def score(self, text):
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        return round(1 + digest[0] % 90 / 10, 1)
+
+    def respond(self, prompt, generation_config=None):
+        wants_json = (generation_config or {}).get("response_mime_type") == "application/json"
+        if not wants_json:
+            return f"{self.score(prompt):.1f}"
+
+        start = prompt.find("[")
+        if "Campaigns:" not in prompt or start == -1:
+            return json.dumps({"score": self.score(prompt)})
+        with self._lock:
+            keep = [self._random.random() >= self.drop_rate for _ in range(prompt.count('"id"'))]
+        items = json.loads(prompt[start:prompt.rindex("]") + 1])
+        return json.dumps({"scores": {item["id"]: self.score(item["campaign"])
+                                      for item, kept in zip(items, keep) if kept}})
+
+# In-memory stand-in for the firestore.client() surface the app uses:
+# collections/subcollections, documents, where/order_by/limit/select/
+# start_after queries, count() aggregations, write batches and
+# transactions. reads/writes count billed operations; latency is added
+# to every round trip.
+class FakeFirestore:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.reads = 0
+        self.writes = 0
+        self._collections = {}
+        self._lock = threading.RLock()
+
+    def _round_trip(self, reads=0, writes=0):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.reads += reads
+            self.writes += writes
+
+    def _docs(self, path):
+        return self._collections.setdefault(path, {})
+
+    def collection(self, name):
+        return FakeCollection(self, name)
+
+    def batch(self):
+        return FakeWriteBatch(self)
+
+    def transaction(self, **kwargs):
+        return FakeTransaction(self)
+
+    def _validate(self, op, path, doc_id):
+        exists = doc_id in self._docs(path)
+        if op == "create" and exists:
+            raise AlreadyExists(f"Document already exists: {path}/{doc_id}")
+        if op == "update" and not exists:
+            raise NotFound(f"No document to update: {path}/{doc_id}")
+
+    # Apply one write; SERVER_TIMESTAMP becomes the current time and
+    # DELETE_FIELD / Increment / ArrayUnion transforms are applied in place
+    def _apply(self, op, path, doc_id, data=None, merge=False):
+        self._validate(op, path, doc_id)
+        docs = self._docs(path)
+        if op == "delete":
+            docs.pop(doc_id, None)
+            return
+
+        current = copy.deepcopy(docs.get(doc_id, {})) if op == "update" or merge else {}
+        for key, value in data.items():
+            target = current
+            *parents, leaf = key.split(".") if op == "update" else [key]
+            for parent in parents:
+                target = target.setdefault(parent, {})
+            if value is firestore.DELETE_FIELD:
+                target.pop(leaf, None)
+            elif isinstance(value, firestore.Increment):
+                target[leaf] = (target.get(leaf) or 0) + value.value
+            elif isinstance(value, firestore.ArrayUnion):
+                target[leaf] = list(target.get(leaf) or []) + [v for v in value.values
+                                                              if v not in (target.get(leaf) or [])]
+            else:
+                target[leaf] = _resolve_sentinels(copy.deepcopy(value))
+        docs[doc_id] = current
+
+def _resolve_sentinels(data):
+    if isinstance(data, dict):
+        return {key: _resolve_sentinels(value) for key, value in data.items()}
+    if data is firestore.SERVER_TIMESTAMP:
+        return datetime.now(timezone.utc)
+    return data
+
+_MISSING = object()
+
+def _field(data, path, default=None):
+    for part in path.split("."):
+        if not isinstance(data, dict) or part not in data:
+            return default
+        data = data[part]
+    return data
+
+# Firestore never matches a document that lacks the filtered field
+def _matches(data, field, op, value):
+    actual = _field(data, field, _MISSING)
+    if actual is _MISSING:
+        return False
+    try:
+        if op == "==":
+            return actual == value
+        if op == "!=":
+            return actual != value
+        if op == "<":
+            return actual < value
+        if op == "<=":
+            return actual <= value
+        if op == ">":
+            return actual > value
+        if op == ">=":
+            return actual >= value
+        if op == "in":
+            return actual in value
+        if op == "not-in":
+            return actual not in value
+        if op == "array_contains":
+            return value in (actual or [])
+        if op == "array_contains_any":
+            return any(item in (actual or []) for item in value)
+    except TypeError:
+        return False
+    raise ValueError(f"Unsupported operator: {op}")
+
+class FakeDocumentSnapshot:
+    def __init__(self, reference, data, fields=None):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        self._data = None
+        if data is not None:
+            self._data = copy.deepcopy({key: value for key, value in data.items()
+                                        if fields is None or key in fields})
+
+    def to_dict(self):
+        return copy.deepcopy(self._data) if self.exists else None
+
+    def get(self, field):
+        return _field(self._data, field)
+
+class FakeDocumentReference:
+    def __init__(self, db, path, doc_id):
+        self._db = db
+        self._path = path
+        self.id = doc_id
+        self.path = f"{path}/{doc_id}"
+
+    def collection(self, name):
+        return FakeCollection(self._db, f"{self.path}/{name}")
+
+    def get(self, field_paths=None, transaction=None):
+        self._db._round_trip(reads=1)
+        with self._db._lock:
+            return FakeDocumentSnapshot(self, self._db._docs(self._path).get(self.id), field_paths)
+
+    def _write(self, op, data=None, merge=False):
+        self._db._round_trip(writes=1)
+        with self._db._lock:
+            self._db._apply(op, self._path, self.id, data, merge)
+
+    def set(self, data, merge=False):
+        self._write("set", data, merge)
+
+    def create(self, data):
+        self._write("create", data)
+
+    def update(self, data):
+        self._write("update", data)
+
+    def delete(self):
+        self._write("delete")
+
+class FakeAggregationResult:
+    def __init__(self, alias, value):
+        self.alias = alias
+        self.value = value
+
+class FakeAggregationQuery:
+    def __init__(self, query, alias):
+        self._query = query
+        self._alias = alias or "field_1"
+
+    def get(self, transaction=None):
+        self._query._db._round_trip(reads=1)
+        return [[FakeAggregationResult(self._alias, len(self._query._matching()))]]
+
+class FakeQuery:
+    def __init__(self, db, path, filters=(), orders=(), limit=None, fields=None, cursor=None):
+        self._db = db
+        self._path = path
+        self._filters = tuple(filters)
+        self._orders = tuple(orders)
+        self._limit = limit
+        self._fields = fields
+        self._cursor = cursor
+
+    def _copy(self, **changes):
+        state = dict(filters=self._filters, orders=self._orders, limit=self._limit,
+                     fields=self._fields, cursor=self._cursor)
+        state.update(changes)
+        return FakeQuery(self._db, self._path, **state)
+
+    def where(self, field_path=None, op_string=None, value=None, filter=None):
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return self._copy(filters=self._filters + ((field_path, op_string, value),))
+
+    def order_by(self, field_path, direction="ASCENDING"):
+        return self._copy(orders=self._orders + ((field_path, direction),))
+
+    def limit(self, count):
+        return self._copy(limit=count)
+
+    def select(self, field_paths):
+        return self._copy(fields=list(field_paths))
+
+    def start_after(self, document_fields_or_snapshot):
+        return self._copy(cursor=document_fields_or_snapshot)
+
+    def count(self, alias=None):
+        return FakeAggregationQuery(self, alias)
+
+    def _order_key(self, data):
+        return tuple(_field(data, field) for field, _ in self._orders)
+
+    def _matching(self):
+        with self._db._lock:
+            items = list(self._db._docs(self._path).items())
+        items = [(doc_id, data) for doc_id, data in items
+                 if all(_matches(data, *condition) for condition in self._filters)
+                 and all(_field(data, field) is not None for field, _ in self._orders)]
+        items.sort(key=lambda item: item[0])
+        for field, direction in reversed(self._orders):
+            items.sort(key=lambda item: _field(item[1], field), reverse=direction == "DESCENDING")
+        return items
+
+    def _after_cursor(self, items):
+        cursor = self._cursor
+        if cursor is None:
+            return items
+        if isinstance(cursor, FakeDocumentSnapshot):
+            for position, (doc_id, _) in enumerate(items):
+                if doc_id == cursor.id:
+                    return items[position + 1:]
+            cursor = cursor.to_dict() or {}
+        key = self._order_key(cursor)
+        for position, (_, data) in enumerate(items):
+            if self._order_key(data) == key:
+                return items[position + 1:]
+        return items
+
+    def stream(self, transaction=None):
+        items = self._after_cursor(self._matching())
+        if self._limit is not None:
+            items = items[:self._limit]
+        self._db._round_trip(reads=max(1, len(items)))
+        for doc_id, data in items:
+            yield FakeDocumentSnapshot(FakeDocumentReference(self._db, self._path, doc_id), data, self._fields)
+
+    def get(self, transaction=None):
+        return list(self.stream())
+
+class FakeCollection(FakeQuery):
+    def __init__(self, db, path):
+        super().__init__(db, path)
+        self.id = path.rsplit("/", 1)[-1]
+
+    def document(self, document_id=None):
+        return FakeDocumentReference(self._db, self._path, document_id or uuid.uuid4().hex[:20])
+
+    def add(self, data):
+        ref = self.document()
+        ref.set(data)
+        return None, ref
+
+# All-or-nothing batch of writes, like WriteBatch
+class FakeWriteBatch:
+    def __init__(self, db):
+        self._db = db
+        self._ops = []
+
+    def set(self, reference, data, merge=False):
+        self._ops.append(("set", reference, data, merge))
+
+    def create(self, reference, data):
+        self._ops.append(("create", reference, data, False))
+
+    def update(self, reference, data):
+        self._ops.append(("update", reference, data, False))
+
+    def delete(self, reference):
+        self._ops.append(("delete", reference, None, False))
+
+    def commit(self):
+        ops, self._ops = self._ops, []
+        self._db._round_trip(writes=len(ops))
+        with self._db._lock:
+            for op, reference, _, _ in ops:
+                self._db._validate(op, reference._path, reference.id)
+            for op, reference, data, merge in ops:
+                self._db._apply(op, reference._path, reference.id, data, merge)
+        return [None] * len(ops)
+
+# Transaction run by utils.firebase.run_transaction. It holds the fake's
+# lock from the first read to the commit, so it never conflicts and needs
+# no retries.
+class FakeTransaction(FakeWriteBatch):
+    def run(self, fn):
+        with self._db._lock:
+            try:
+                result = fn(self)
+            except BaseException:
+                self._ops = []
+                raise
+            self.commit()
+            return result
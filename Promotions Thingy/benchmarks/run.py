@@ -0,0 +1,339 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("LLM_CACHE_DISABLED", "1")
+# Measure the scoring loop rather than the production request quota
+os.environ.setdefault("GEMINI_REQUESTS_PER_MINUTE", "6000")
+
+from benchmarks.synthetic import make_campaigns, make_inventory, make_menu, seed_firestore
+from utils.dish_index import DishIndex
+from benchmarks.fakes import FakeFirestore, FakeGenerativeModel
+from utils.inventory_index import InventoryIndex
+from utils.inventory_utils import filter_valid_ingredients, find_possible_dishes
+from utils.servings import DURATION_DAYS, RecipeMatrix, required_servings
+
+PAGE = os.path.join(ROOT, "pages", "campaign_portal.py")
+RESULTS_PATH = os.path.join(ROOT, "benchmarks", "results", "history.jsonl")
+
+# Results this much worse than the previous run of the same scale are flagged;
+# page timings through AppTest are noisy, so the margin is generous
+REGRESSION_THRESHOLD = 1.5
+
+# Data sizes per scale: inventory rows, menu dishes, distinct ingredients, campaigns
+SCALES = {
+    "small": {"inventory": 10_000, "dishes": 200, "ingredients": 500, "campaigns": 200},
+    "medium": {"inventory": 100_000, "dishes": 2_000, "ingredients": 2_000, "campaigns": 1_000},
+    "large": {"inventory": 1_000_000, "dishes": 10_000, "ingredients": 5_000, "campaigns": 5_000},
+}
+
+# Best of `repeat` timings, in seconds
+def best_of(fn, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def bench_filter_valid_ingredients(scale):
+    df = make_inventory(scale["inventory"], scale["ingredients"])
+    return {"seconds": best_of(lambda: filter_valid_ingredients(df))}
+
+def bench_find_possible_dishes(scale):
+    menu_df = make_menu(scale["dishes"], scale["ingredients"])
+    available = filter_valid_ingredients(make_inventory(scale["inventory"], scale["ingredients"]))
+    index = DishIndex(menu_df)
+    return {
+        "index_build_seconds": best_of(lambda: DishIndex(menu_df)),
+        "seconds": best_of(lambda: find_possible_dishes(menu_df, available, index)),
+    }
+
+# Expiry index build and forward stock for every campaign duration option
+def bench_inventory_index(scale):
+    inventory_df = make_inventory(scale["inventory"], scale["ingredients"])
+    index = InventoryIndex(inventory_df)
+    durations = list(DURATION_DAYS) + ["This Week"]
+    return {
+        "build_seconds": best_of(lambda: InventoryIndex(inventory_df)),
+        "seconds": best_of(lambda: index.availability(durations)),
+    }
+
+# Submit-path filtering as the page runs it, on prebuilt indexes
+def bench_dish_filtering(scale):
+    menu_df = make_menu(scale["dishes"], scale["ingredients"])
+    inventory_index = InventoryIndex(make_inventory(scale["inventory"], scale["ingredients"]))
+    matrix = RecipeMatrix(menu_df)
+
+    def run():
+        return matrix.dishes_with_servings(inventory_index.stock_through("This Week"), required_servings("This Week"))
+
+    return {"seconds": best_of(run)}
+
+# Goal ranking and token-budget trim of every menu dish; prompt_tokens is the
+# dish list's estimated size, which should not grow with the scale
+def bench_dish_ranking(scale):
+    from utils.dish_ranking import dish_token_counts, fit_to_budget, rank_dishes
+
+    menu_df = make_menu(scale["dishes"], scale["ingredients"])
+    inventory_index = InventoryIndex(make_inventory(scale["inventory"], scale["ingredients"]))
+    matrix, token_counts = RecipeMatrix(menu_df), dish_token_counts(menu_df)
+    dishes = matrix.dish_names
+
+    def run():
+        return fit_to_budget(rank_dishes(dishes, "Reduce Food Wastage", matrix, inventory_index, "This Week"),
+                             token_counts)
+
+    selected = run()
+    return {"seconds": best_of(run), "dishes": len(selected),
+            "prompt_tokens": sum(token_counts[dish] for dish in selected)}
+
+def _app_test(db, model):
+    import streamlit as st
+    from streamlit.logger import set_log_level
+    from streamlit.testing.v1 import AppTest
+
+    import utils.firebase
+    import utils.gemini
+    from utils.snapshot import close_snapshots
+
+    # Clients are cached per process, so drop the previous benchmark's fakes
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    set_log_level("error")
+    close_snapshots()
+    utils.firebase._db = db
+    utils.gemini._model = model
+    return AppTest.from_file(PAGE, default_timeout=300)
+
+def _check(app):
+    if app.exception:
+        raise RuntimeError(f"page raised: {app.exception[0].message}")
+
+# Full submit through the page: snapshot load, filtering, streamed generation and save
+def bench_submit(scale):
+    db = seed_firestore(FakeFirestore(), make_menu(scale["dishes"], scale["ingredients"]),
+                        make_inventory(scale["inventory"], scale["ingredients"]))
+    app = _app_test(db, FakeGenerativeModel(latency=0))
+    app.run()
+    _check(app)
+    app.text_input(key="staff_name_input").input("Bench Staff")
+    app.run()
+    reads = db.reads
+    start = time.perf_counter()
+    app.button(key="submit_campaign_button").click().run()
+    elapsed = time.perf_counter() - start
+    _check(app)
+    if not db.collection("staff_campaigns").document(f"Bench Staff_{datetime.now():%Y-%m}").get().exists:
+        raise RuntimeError("submit did not save a campaign")
+    return {"seconds": elapsed, "reads": db.reads - reads}
+
+# Headless scoring worker over a month of unscored campaigns
+def bench_admin_scoring(scale):
+    from utils.jobs import enqueue_scoring_job, run_job
+
+    month = datetime.now().strftime("%Y-%m")
+    db = seed_firestore(FakeFirestore(), campaigns=make_campaigns(scale["campaigns"], month, scored_share=0))
+    model = FakeGenerativeModel(latency=0.01, seed=1)
+    job_id = enqueue_scoring_job(db, month, scale["campaigns"])
+    start = time.perf_counter()
+    run_job(db, model, job_id, "bench", log=lambda message: None)
+    elapsed = time.perf_counter() - start
+    job = db.collection("scoring_jobs").document(job_id).get().to_dict()
+    return {"seconds": elapsed, "campaigns_per_second": job["scored"] / elapsed, "model_calls": model.calls,
+            "reads": db.reads, "writes": db.writes, "failed": job["failed"]}
+
+# Scoring a month where 30% of the campaigns near-duplicate an earlier one:
+# signature cost per campaign, and model calls saved by reusing scores
+def bench_near_duplicates(scale):
+    from utils.jobs import enqueue_scoring_job, run_job
+    from utils.near_duplicates import signature_fields
+
+    month = datetime.now().strftime("%Y-%m")
+    campaigns = make_campaigns(scale["campaigns"], month, scored_share=0, duplicate_share=0.3)
+    texts = [data["campaign"] for data in campaigns.values()][:200]
+    signature_seconds = best_of(lambda: [signature_fields(text) for text in texts]) / len(texts)
+
+    db = seed_firestore(FakeFirestore(), campaigns=campaigns)
+    model = FakeGenerativeModel(latency=0.01, seed=1)
+    job_id = enqueue_scoring_job(db, month, scale["campaigns"])
+    start = time.perf_counter()
+    run_job(db, model, job_id, "bench", log=lambda message: None)
+    elapsed = time.perf_counter() - start
+    job = db.collection("scoring_jobs").document(job_id).get().to_dict()
+    return {"signature_seconds": signature_seconds, "seconds": elapsed, "model_calls": model.calls,
+            "reused": job["reused"], "reads": db.reads}
+
+# Page render with a scored month on the leaderboard: best first run of a
+# fresh session, then reruns of the last one
+def bench_leaderboard(scale, sessions=3, reruns=3):
+    from utils.leaderboard import rebuild_leaderboard
+
+    month = datetime.now().strftime("%Y-%m")
+    db = seed_firestore(FakeFirestore(), campaigns=make_campaigns(scale["campaigns"], month))
+    rebuild_leaderboard(db, month)
+    firsts = []
+    for _ in range(sessions):
+        app = _app_test(db, FakeGenerativeModel(latency=0))
+        app.session_state["portal_tab"] = "🏆 Leaderboard"
+        reads = db.reads
+        start = time.perf_counter()
+        app.run()
+        firsts.append(time.perf_counter() - start)
+        _check(app)
+    first_reads = db.reads - reads
+    timings = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        app.run()
+        timings.append(time.perf_counter() - start)
+    return {"seconds": min(firsts), "rerun_seconds": statistics.median(timings), "reads": first_reads}
+
+# Score chart for every scored campaign, drawn from the aggregate's
+# histogram: building and serializing the figure, against a rerun that finds it cached (digest plus serializing)
+def bench_score_chart(scale):
+    import plotly.io as pio
+
+    from utils.charts import score_figure, scores_digest
+    from utils.leaderboard import score_histogram
+
+    campaigns = make_campaigns(scale["campaigns"], datetime.now().strftime("%Y-%m"), scored_share=1)
+    names = [data["name"] for data in campaigns.values()]
+    scores = [data["ai_score"] for data in campaigns.values()]
+    histogram = score_histogram(scores)
+    fig = score_figure(names, scores, histogram)
+    return {"seconds": best_of(lambda: pio.to_json(score_figure([], [], histogram), validate=False)),
+            "cached_seconds": best_of(lambda: (scores_digest([], [], histogram), pio.to_json(fig, validate=False))),
+            "payload_bytes": len(pio.to_json(fig, validate=False))}
+
+# Chain-wide leaderboard and stats over 8 outlets with 20 ms per round trip:
+# one parallel fan-out against reading the outlets one after another
+def bench_chain_summary(scale, outlets=8, latency=0.02):
+    from utils.campaigns import count_campaigns
+    from utils.leaderboard import load_leaderboard, rebuild_leaderboard
+    from utils.outlets import chain_summary, get_outlet_db
+
+    month = datetime.now().strftime("%Y-%m")
+    names = [f"outlet{i}" for i in range(outlets)]
+    db = FakeFirestore()
+    for i, name in enumerate(names):
+        seed_firestore(db, campaigns=make_campaigns(scale["campaigns"] // outlets, month, seed=i), outlet=name)
+        rebuild_leaderboard(get_outlet_db(db, name), month)
+    db.latency = latency
+
+    def sequential():
+        return [(load_leaderboard(get_outlet_db(db, name), month), count_campaigns(get_outlet_db(db, name), month))
+                for name in names]
+
+    reads = db.reads
+    summary = chain_summary(db, month, names)
+    reads = db.reads - reads
+    return {"seconds": best_of(lambda: chain_summary(db, month, names)), "sequential_seconds": best_of(sequential),
+            "reads": reads, "campaigns": summary["count"]}
+
+# On-demand export of three months of scored campaigns in each format,
+# streamed from cursor pages
+def bench_export(scale):
+    from utils.exports import EXPORT_FORMATS, export_campaigns, recent_months
+
+    months = recent_months(3)
+    db = FakeFirestore()
+    for i, month in enumerate(months):
+        seed_firestore(db, campaigns=make_campaigns(scale["campaigns"], month, scored_share=1, seed=i))
+    result = {}
+    for extension, _ in EXPORT_FORMATS.values():
+        name = extension.replace(".", "_")
+        reads = db.reads
+        payload = export_campaigns(db, months, extension)
+        result[f"{name}_reads"] = db.reads - reads
+        result[f"{name}_seconds"] = best_of(lambda: export_campaigns(db, months, extension))
+        result[f"{name}_bytes"] = len(payload)
+    return result
+
+BENCHMARKS = {
+    "filter_valid_ingredients": bench_filter_valid_ingredients,
+    "find_possible_dishes": bench_find_possible_dishes,
+    "inventory_index": bench_inventory_index,
+    "dish_filtering": bench_dish_filtering,
+    "dish_ranking": bench_dish_ranking,
+    "submit": bench_submit,
+    "admin_scoring": bench_admin_scoring,
+    "near_duplicates": bench_near_duplicates,
+    "leaderboard": bench_leaderboard,
+    "score_chart": bench_score_chart,
+    "export": bench_export,
+    "chain_summary": bench_chain_summary,
+}
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def previous_run(scale, path=RESULTS_PATH):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        runs = [json.loads(line) for line in f if line.strip()]
+    runs = [run for run in runs if run["scale"] == scale]
+    return runs[-1] if runs else None
+
+def save_run(run, path=RESULTS_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(run) + "\n")
+
+def _fmt(value):
+    return f"{value:>12,}" if isinstance(value, int) else f"{value:>12.4g}"
+
+# Timings and counters (reads, writes, calls) regress upwards, rates downwards
+def compare(name, result, previous):
+    lines = []
+    for key, value in result.items():
+        before = (previous or {}).get(key)
+        if not before or not isinstance(value, (int, float)):
+            lines.append(f"  {name:<26} {key:<22} {_fmt(value)}")
+            continue
+        ratio = value / before
+        worse = ratio > REGRESSION_THRESHOLD if key.endswith(("seconds", "reads")) or key in ("writes", "model_calls") \
+            else ratio < 1 / REGRESSION_THRESHOLD
+        flag = "  REGRESSION" if worse else ""
+        lines.append(f"  {name:<26} {key:<22} {_fmt(value)}  was {before:>10.4g} ({ratio:5.2f}x){flag}")
+    return lines, any(line.endswith("REGRESSION") for line in lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the portal against in-memory Firestore and Gemini fakes.")
+    parser.add_argument("--scale", choices=list(SCALES), default="small")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="run only these benchmarks")
+    parser.add_argument("--no-save", action="store_true", help="don't append this run to the results history")
+    args = parser.parse_args()
+
+    previous = previous_run(args.scale)
+    run = {"scale": args.scale, "revision": git_revision(), "at": datetime.now().isoformat(timespec="seconds"),
+           "results": {}}
+    print(f"scale={args.scale} revision={run['revision']} "
+          f"previous={previous['revision'] if previous else None}")
+
+    regressed = False
+    for name in args.only or BENCHMARKS:
+        result = BENCHMARKS[name](SCALES[args.scale])
+        run["results"][name] = result
+        lines, worse = compare(name, result, (previous or {}).get("results", {}).get(name))
+        print("\n".join(lines))
+        regressed |= worse
+
+    if not args.no_save:
+        save_run(run)
+    return 1 if regressed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+UNITS = ['kg', 'g', 'l', 'ml', 'pcs', 'pieces', 'box']
+PROMOTION_TYPES = ["Buy 1 Get 1", "Percentage Discount", "Fixed Amount Off", "Combo Offer", "Happy Hour",
+                   "Bundle Deal", "Free Item", "Loyalty Reward"]
+GOALS = ["Reduce Food Wastage", "Increase Daily Orders", "Launch New Dish", "Clear Excess Inventory",
+         "Boost Weekend Sales", "Attract New Customers", "Increase Average Order Value"]
+CAMPAIGN_WORDS = ("fresh tasty weekend family combo offer pizza pasta salad dessert deal save today "
+                  "order now limited special chef favourite share enjoy").split()
+
+# Synthetic data shaped like the menu, ingredient_inventory and staff_campaigns collections
+
+def ingredient_name(i):
+    return f"Ingredient {i}"
+
+# Inventory export rows: Ingredient / "Quantity unit" / dd/mm/yyyy expiry
+def make_inventory(rows, ingredients=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    amounts = rng.integers(0, 5000, rows) / 10
+    units = rng.choice(UNITS, rows)
+    base = datetime.now() - timedelta(days=30)
+    expiry = pd.Series(base + pd.to_timedelta(rng.integers(0, 90, rows), unit='D'))
+    return pd.DataFrame({
+        'Ingredient': [ingredient_name(i) for i in rng.integers(0, ingredients, rows)],
+        'Quantity': [f"{a:g} {u}" for a, u in zip(amounts, units)],
+        'Expiry Date': expiry.dt.strftime('%d/%m/%Y'),
+    })
+
+# Menu docs with 3-10 ingredients each and per-serving amounts
+def make_menu(dishes, ingredients=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    names, recipes, quantities = [], [], []
+    for d in range(dishes):
+        used = [ingredient_name(i) for i in rng.choice(ingredients, rng.integers(3, 11), replace=False)]
+        names.append(f"Dish {d}")
+        recipes.append(used)
+        quantities.append({name: f"{rng.integers(5, 300)} g" for name in used})
+    return pd.DataFrame({'name': names, 'ingredients': recipes, 'ingredient_quantities': quantities})
+
+def make_campaign_text(rng, words=120):
+    return " ".join(rng.choice(CAMPAIGN_WORDS, words))
+
+# staff_campaigns docs for a month; scored_share of them already carry a
+# score and duplicate_share copy an earlier campaign with one word changed
+def make_campaigns(count, month, scored_share=0.5, words=120, seed=0, duplicate_share=0.0):
+    rng = np.random.default_rng(seed)
+    docs, texts = {}, []
+    for i in range(count):
+        name = f"Staff {i}"
+        if texts and rng.random() < duplicate_share:
+            text = texts[rng.integers(len(texts))].split()
+            text[rng.integers(len(text))] = str(rng.choice(CAMPAIGN_WORDS))
+            text = " ".join(text)
+        else:
+            text = make_campaign_text(rng, words)
+        texts.append(text)
+        data = {
+            "name": name,
+            "campaign": text,
+            "promotion_type": PROMOTION_TYPES[i % len(PROMOTION_TYPES)],
+            "goal": GOALS[i % len(GOALS)],
+            "target_audience": "All Customers",
+            "campaign_duration": "This Week",
+            "month": month,
+            "scored": False,
+        }
+        if rng.random() < scored_share:
+            data.update(ai_score=round(float(rng.uniform(3, 10)), 1), scored=True)
+        docs[f"{name}_{month}"] = data
+    return docs
+
+# Load generated data into a FakeFirestore without counting it as billed
+# writes; with an outlet it goes under outlets/{outlet}/
+def seed_firestore(db, menu_df=None, inventory_df=None, campaigns=None, outlet=None):
+    prefix = f"outlets/{outlet}/" if outlet else ""
+    with db._lock:
+        if menu_df is not None:
+            for i, row in enumerate(menu_df.to_dict("records")):
+                db._apply("set", f"{prefix}menu", f"dish_{i}", row)
+        if inventory_df is not None:
+            for i, row in enumerate(inventory_df.to_dict("records")):
+                db._apply("set", f"{prefix}ingredient_inventory", f"lot_{i}", row)
+        for doc_id, data in (campaigns or {}).items():
+            db._apply("set", f"{prefix}staff_campaigns", doc_id, data)
+    return db
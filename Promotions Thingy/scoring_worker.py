@@ -0,0 +1,85 @@
+import argparse
+import os
+import time
+
+from utils.campaigns import backfill_scored_flags
+from utils.firebase import init_firebase
+from utils.gemini import init_gemini
+from utils.jobs import new_worker_id, next_job, run_job
+from utils.near_duplicates import index_campaigns
+from utils.outlets import OUTLETS, get_outlet_db
+from utils.rollups import write_rollup
+
+# Headless scoring worker: drains queued scoring jobs outside Streamlit.
+# Several can run at once; campaign leases keep them from double-scoring.
+#
+#   python scoring_worker.py            # poll for jobs forever
+#   python scoring_worker.py --once     # drain what's queued, then exit
+#   python scoring_worker.py --rollup 2024-05 --rollup 2024-06   # backfill monthly rollups
+#   python scoring_worker.py --index-campaigns                   # backfill near-duplicate signatures
+#   python scoring_worker.py --backfill-scored 2024-05           # set the scored flag on older campaigns
+#   python scoring_worker.py --outlet downtown                   # only one outlet's jobs (see OUTLETS)
+
+def main():
+    parser = argparse.ArgumentParser(description="Score queued staff campaigns with Gemini")
+    parser.add_argument("--once", action="store_true", help="exit when no job is queued")
+    parser.add_argument("--poll", type=float, default=10.0, help="seconds between queue checks")
+    parser.add_argument("--credentials", default=os.environ.get("FIREBASE_CREDENTIALS"),
+                        help="service account JSON (defaults to the app's)")
+    parser.add_argument("--rollup", action="append", default=[], metavar="YYYY-MM",
+                        help="rewrite the monthly rollup for a month and exit (repeatable)")
+    parser.add_argument("--outlet", action="append", default=[], metavar="ID",
+                        help="outlet to work on (repeatable; defaults to every configured outlet)")
+    parser.add_argument("--backfill-scored", action="append", default=[], metavar="YYYY-MM",
+                        help="set the scored flag on a month's campaigns written before it existed, "
+                             "and exit (repeatable)")
+    parser.add_argument("--index-campaigns", action="store_true",
+                        help="store near-duplicate signatures on campaigns that lack them and exit")
+    args = parser.parse_args()
+
+    root = init_firebase(args.credentials) if args.credentials else init_firebase()
+    outlets = {outlet: get_outlet_db(root, outlet) for outlet in args.outlet or OUTLETS or [None]}
+    if args.rollup:
+        for outlet, db in outlets.items():
+            for month in args.rollup:
+                rollup = write_rollup(db, month)
+                print(f"{outlet + ': ' if outlet else ''}{month}: "
+                      f"{rollup['scored']} of {rollup['submitted']} campaigns scored")
+        return
+    if args.backfill_scored:
+        for outlet, db in outlets.items():
+            for month in args.backfill_scored:
+                print(f"{outlet + ': ' if outlet else ''}{month}: "
+                      f"set the scored flag on {backfill_scored_flags(db, month)} campaigns")
+        return
+    if args.index_campaigns:
+        for outlet, db in outlets.items():
+            print(f"{outlet + ': ' if outlet else ''}indexed {index_campaigns(db)} campaigns")
+        return
+
+    model = init_gemini()
+    worker_id = new_worker_id()
+    print(f"Scoring worker {worker_id} started")
+
+    while True:
+        # One job per outlet per pass, so a busy outlet can't starve the others.
+        # A job whose remaining campaigns are all leased by other workers is
+        # not progress: wait out the poll interval instead of re-querying.
+        # run_job records failed rounds on the job itself; anything else
+        # (e.g. Firestore unreachable) is logged and retried on the next pass.
+        worked = False
+        for outlet, db in outlets.items():
+            try:
+                job = next_job(db)
+                if job is not None:
+                    worked |= run_job(db, model, job[0], worker_id)
+            except Exception as error:
+                print(f"{outlet + ': ' if outlet else ''}scoring pass failed: {error!r}")
+        if worked:
+            continue
+        if args.once:
+            break
+        time.sleep(args.poll)
+
+if __name__ == "__main__":
+    main()
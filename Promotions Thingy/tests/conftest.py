@@ -0,0 +1,29 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Keep the on-disk response cache out of the tests
+os.environ.setdefault("LLM_CACHE_DISABLED", "1")
+
+from benchmarks.fakes import FakeFirestore
+
+MONTH = "2024-05"
+
+@pytest.fixture
+def db():
+    return FakeFirestore()
+
+# Campaign doc as the portal stores it; pass ai_score for a scored one
+def make_campaign(name, text="Buy one get one free on soups", month=MONTH, **fields):
+    data = {"name": name, "campaign": text, "promotion_type": "Discount", "goal": "Reduce Food Wastage",
+            "target_audience": "All Customers", "campaign_duration": "This Week", "month": month,
+            "scored": "ai_score" in fields}
+    data.update(fields)
+    return data
+
+def seed_campaigns(db, campaigns):
+    for doc_id, data in campaigns.items():
+        db.collection("staff_campaigns").document(doc_id).set(data)
+    db.reads = db.writes = 0
@@ -0,0 +1,47 @@
+from conftest import MONTH, make_campaign, seed_campaigns
+from utils.campaigns import backfill_scored_flags, count_campaigns, count_unflagged, iter_unscored, unscored_page
+from utils.jobs import claim_campaigns
+
+def _legacy(name, **fields):
+    data = make_campaign(name, **fields)
+    del data["scored"]
+    return data
+
+def _seed(db, unscored=5, scored=3, legacy_unscored=0, legacy_scored=0):
+    campaigns = {f"u{i}": make_campaign(f"U {i}") for i in range(unscored)}
+    campaigns.update({f"s{i}": make_campaign(f"S {i}", ai_score=6.0) for i in range(scored)})
+    campaigns.update({f"lu{i}": _legacy(f"LU {i}") for i in range(legacy_unscored)})
+    campaigns.update({f"ls{i}": _legacy(f"LS {i}", ai_score=7.0) for i in range(legacy_scored)})
+    campaigns["other_month"] = make_campaign("Other", month="2024-04")
+    seed_campaigns(db, campaigns)
+
+def test_counts_cost_one_read_each(db):
+    _seed(db)
+    assert count_campaigns(db, MONTH) == (8, 3)
+    assert db.reads == 2
+
+def test_unscored_pages_cover_every_unscored_campaign_once(db):
+    _seed(db, unscored=23, scored=10)
+    docs, cursor = unscored_page(db, MONTH, page_size=10)
+    assert len(docs) == 10 and cursor is not None
+    ids = [doc.id for doc in iter_unscored(db, MONTH, page_size=10)]
+    assert sorted(ids) == sorted(f"u{i}" for i in range(23))
+
+def test_flagged_month_has_nothing_to_migrate(db):
+    _seed(db)
+    assert count_unflagged(db, MONTH, *count_campaigns(db, MONTH)) == 0
+
+# Docs written before the scored flag count as unscored but are invisible
+# to the unscored cursor until migrated
+def test_legacy_campaigns_are_detected_and_migrated(db):
+    _seed(db, unscored=2, scored=1, legacy_unscored=3, legacy_scored=2)
+    total, scored = count_campaigns(db, MONTH)
+    assert (total, scored) == (8, 1)
+    assert count_unflagged(db, MONTH, total, scored) == 5
+    assert len(claim_campaigns(db, MONTH, "w1")[0]) == 2
+
+    assert backfill_scored_flags(db, MONTH) == 5
+    total, scored = count_campaigns(db, MONTH)
+    assert (total, scored) == (8, 3)
+    assert count_unflagged(db, MONTH, total, scored) == 0
+    assert sorted(doc_id for doc_id, _ in claim_campaigns(db, MONTH, "w2")[0]) == ["lu0", "lu1", "lu2"]
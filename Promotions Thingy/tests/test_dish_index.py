@@ -0,0 +1,31 @@
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import ingredient_name, make_menu
+from utils.dish_index import DishIndex, split_ingredients
+from utils.inventory_utils import find_possible_dishes
+
+# Dishes whose every ingredient is available, recomputed from scratch
+def brute_force(menu_df, available):
+    available = {ingredient.strip().lower() for ingredient in available}
+    return [name for name, ingredients in zip(menu_df['name'], menu_df['ingredients'])
+            if set(split_ingredients(ingredients)) <= available]
+
+def test_split_ingredients_accepts_lists_and_strings():
+    assert split_ingredients(" Rice, tomato ,, ") == ["rice", "tomato"]
+    assert split_ingredients(["Rice", " ", "Egg "]) == ["rice", "egg"]
+    assert split_ingredients(None) == []
+
+def test_mixed_case_and_string_ingredients():
+    menu_df = pd.DataFrame({"name": ["Fried Rice", "Omelette", "Water"],
+                            "ingredients": ["Rice, Egg", ["egg", "Butter"], []]})
+    assert find_possible_dishes(menu_df, ["RICE", "egg "]) == ["Fried Rice", "Water"]
+
+@pytest.mark.parametrize("seed", range(3))
+def test_incremental_updates_match_a_full_recompute(seed):
+    menu_df = make_menu(300, ingredients=60, seed=seed)
+    index = DishIndex(menu_df)
+    pool = [ingredient_name(i) for i in range(60)]
+    for step in range(20):
+        available = pool[step % 7::2] + pool[:step]
+        assert find_possible_dishes(menu_df, available, index) == brute_force(menu_df, available)
@@ -0,0 +1,41 @@
+import csv
+import gzip
+import io
+
+import pyarrow.parquet as pq
+
+from conftest import MONTH, make_campaign, seed_campaigns
+from utils.exports import EXPORT_SCHEMA, export_campaigns, recent_months
+
+SCORES = [4.5, 9.0, 7.25, 1.0, 8.0]
+
+def _seed(db):
+    campaigns = {f"c{i}": make_campaign(f"Staff {i}", ai_score=score) for i, score in enumerate(SCORES)}
+    campaigns["unscored"] = make_campaign("Staff U")
+    campaigns["other"] = make_campaign("Staff O", month="2024-04", ai_score=6.0)
+    seed_campaigns(db, campaigns)
+
+def test_csv_export_is_ranked_across_pages(db):
+    _seed(db)
+    data = export_campaigns(db, [MONTH], "csv.gz", page_size=2)
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(data).decode("utf-8"))))
+    assert list(rows[0]) == EXPORT_SCHEMA.names
+    assert [float(row["ai_score"]) for row in rows] == sorted(SCORES, reverse=True)
+    assert [int(row["rank"]) for row in rows] == [1, 2, 3, 4, 5]
+    assert {row["month"] for row in rows} == {MONTH}
+    assert rows[0]["name"] == "Staff 1"
+
+def test_parquet_export_matches_schema(db):
+    _seed(db)
+    table = pq.read_table(io.BytesIO(export_campaigns(db, ["2024-04", MONTH], "parquet", page_size=2)))
+    assert table.schema.equals(EXPORT_SCHEMA)
+    assert table.column("month").to_pylist() == ["2024-04"] + [MONTH] * len(SCORES)
+    assert table.column("rank").to_pylist() == [1, 1, 2, 3, 4, 5]
+    assert table.column("ai_score").to_pylist() == [6.0] + sorted(SCORES, reverse=True)
+
+def test_empty_export_still_has_a_header(db):
+    rows = list(csv.reader(io.StringIO(gzip.decompress(export_campaigns(db, [MONTH])).decode("utf-8"))))
+    assert rows == [EXPORT_SCHEMA.names]
+
+def test_recent_months_wraps_the_year():
+    assert recent_months(3, "2024-02") == ["2023-12", "2024-01", "2024-02"]
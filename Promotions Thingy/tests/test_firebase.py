@@ -0,0 +1,35 @@
+import time
+
+from google.api_core.exceptions import NotFound
+
+from conftest import make_campaign, seed_campaigns
+from utils.firebase import BatchUpdater
+
+def test_flushes_in_batches_of_max_writes(db):
+    seed_campaigns(db, {f"c{i}": make_campaign(f"Staff {i}") for i in range(5)})
+    updater = BatchUpdater(db, "staff_campaigns", max_writes=2, max_seconds=60)
+    results = [result for i in range(5) for result in updater.update(f"c{i}", {"ai_score": i})]
+    assert [doc_id for doc_id, _, _ in results] == ["c0", "c1", "c2", "c3"]
+    assert updater.pending == [("c4", {"ai_score": 4})]
+    assert [doc_id for doc_id, _, error in updater.flush() if error is None] == ["c4"]
+    assert [db.collection("staff_campaigns").document(f"c{i}").get().get("ai_score") for i in range(5)] == [0, 1, 2, 3, 4]
+
+def test_failed_batch_falls_back_to_single_writes(db):
+    seed_campaigns(db, {"c0": make_campaign("Staff 0"), "c2": make_campaign("Staff 2")})
+    updater = BatchUpdater(db, "staff_campaigns", max_seconds=60)
+    for doc_id in ("c0", "missing", "c2"):
+        updater.update(doc_id, {"ai_score": 5})
+    results = {doc_id: error for doc_id, _, error in updater.flush()}
+    assert results["c0"] is None and results["c2"] is None
+    assert isinstance(results["missing"], NotFound)
+    assert db.collection("staff_campaigns").document("c2").get().get("ai_score") == 5
+
+def test_timer_flushes_a_partial_batch(db):
+    seed_campaigns(db, {"c0": make_campaign("Staff 0")})
+    updater = BatchUpdater(db, "staff_campaigns", max_seconds=0.05)
+    assert updater.update("c0", {"ai_score": 6}) == []
+    deadline = time.monotonic() + 2
+    while updater.pending and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert db.collection("staff_campaigns").document("c0").get().get("ai_score") == 6
+    assert updater.flush() == [("c0", {"ai_score": 6}, None)]
@@ -0,0 +1,34 @@
+import pytest
+
+from utils.gemini import parse_batch_scores, parse_score
+
+@pytest.mark.parametrize("text, expected", [
+    ('{"score": 7.5}', 7.5),
+    ('{"score": "8"}', 8.0),
+    ("6.25", 6.25),
+    ("Score: 9 out of 10", 9.0),
+    ('{"score": 3.14159}', 3.14),
+])
+def test_parse_score(text, expected):
+    assert parse_score(text) == expected
+
+@pytest.mark.parametrize("text", [
+    '{"score": 11}',
+    '{"score": -1}',
+    '{"score": true}',
+    '{"score": null}',
+    '{"x": 1}',
+    "Score: 12",
+    "no score here",
+])
+def test_parse_score_rejects(text):
+    with pytest.raises(ValueError):
+        parse_score(text)
+
+def test_parse_batch_scores_keeps_valid_items():
+    text = '{"scores": {"a": 7, "b": "8.5", "c": 42, "d": "great", "e": 5}}'
+    assert parse_batch_scores(text, ["a", "b", "c", "d", "missing"]) == {"a": 7.0, "b": 8.5}
+
+@pytest.mark.parametrize("text", ["not json", "[1, 2]", '{"scores": [7, 8]}', '{"other": {}}'])
+def test_parse_batch_scores_malformed(text):
+    assert parse_batch_scores(text, ["a"]) == {}
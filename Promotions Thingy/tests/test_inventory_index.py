@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_inventory
+from utils.inventory_index import InventoryIndex
+from utils.inventory_utils import filter_valid_ingredients, valid_inventory
+from utils.servings import stock_levels
+
+@pytest.mark.parametrize("days", [-40, 0, 1, 3, 7, 30, 90])
+def test_stock_matches_a_full_scan(days):
+    inventory_df = make_inventory(3000, ingredients=100)
+    when = datetime.now() + timedelta(days=days)
+    expected = stock_levels(valid_inventory(inventory_df, when))
+    stock = InventoryIndex(inventory_df).stock_at(when)
+    pd.testing.assert_series_equal(stock.sort_index(), expected[expected > 0].sort_index(),
+                                   check_names=False, check_index_type=False, check_dtype=False)
+
+def test_valid_rows_match_valid_inventory():
+    inventory_df = make_inventory(1000, ingredients=50)
+    index = InventoryIndex(inventory_df)
+    assert sorted(index.valid_rows()['Ingredient'].str.lower()) == sorted(filter_valid_ingredients(inventory_df))
+
+def test_skips_unusable_lots():
+    tomorrow = datetime.now() + timedelta(days=1)
+    inventory_df = pd.DataFrame({
+        "Ingredient": ["Tomato", None, "Onion", "Rice", "tomato"],
+        "Quantity": ["2 kg", "1 kg", "bad", "1 kg", "500 g"],
+        "Expiry Date": [f"{tomorrow:%d/%m/%Y}"] * 3 + ["not a date", f"{tomorrow + timedelta(days=5):%d/%m/%Y}"],
+    })
+    index = InventoryIndex(inventory_df)
+    assert index.stock_at().to_dict() == {"tomato": 2500.0}
+    assert index.stock_at(tomorrow + timedelta(days=1)).to_dict() == {"tomato": 500.0}
+
+def test_stock_through_counts_stock_usable_on_the_last_day():
+    today = datetime(2024, 5, 13)
+    inventory_df = pd.DataFrame({
+        "Ingredient": ["Milk", "Milk", "Eggs"],
+        "Quantity": ["1 l", "2 l", "12 pcs"],
+        "Expiry Date": ["14/05/2024", "25/05/2024", "16/05/2024"],
+    })
+    availability = InventoryIndex(inventory_df).availability(["Today Only", "Limited Time (3 days)",
+                                                              "Extended (1 week)"], today)
+    assert availability["Today Only"].to_dict() == {"milk": 3000.0, "eggs": 12.0}
+    assert availability["Limited Time (3 days)"].to_dict() == {"milk": 2000.0, "eggs": 12.0}
+    assert availability["Extended (1 week)"].to_dict() == {"milk": 2000.0}
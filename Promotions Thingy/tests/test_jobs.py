@@ -0,0 +1,131 @@
+import time
+
+from benchmarks.fakes import FakeGenerativeModel
+from conftest import MONTH, make_campaign, seed_campaigns
+from utils import jobs
+from utils.jobs import (MAX_FAILED_ROUNDS, MAX_JOB_ERRORS, claim_campaigns, enqueue_scoring_job, record_job_errors,
+                        run_job)
+
+def _seed(db, count=6, **scored):
+    campaigns = {f"c{i}": make_campaign(f"Staff {i}") for i in range(count)}
+    campaigns.update({doc_id: make_campaign(doc_id, ai_score=score) for doc_id, score in scored.items()})
+    seed_campaigns(db, campaigns)
+
+def _lease(db, doc_id):
+    return db.collection("staff_campaigns").document(doc_id).get().get("score_lease")
+
+def test_claims_only_unscored_campaigns(db):
+    _seed(db, 3, done=7.0)
+    claimed, leased_elsewhere = claim_campaigns(db, MONTH, "w1")
+    assert sorted(doc_id for doc_id, _ in claimed) == ["c0", "c1", "c2"]
+    assert leased_elsewhere == 0
+    assert _lease(db, "c0")["owner"] == "w1"
+    assert _lease(db, "done") is None
+
+def test_workers_never_share_a_campaign(db):
+    _seed(db, 6)
+    first, _ = claim_campaigns(db, MONTH, "w1", limit=4)
+    second, leased_elsewhere = claim_campaigns(db, MONTH, "w2", limit=4)
+    assert len(first) == 4
+    assert len(second) == 2
+    assert not {doc_id for doc_id, _ in first} & {doc_id for doc_id, _ in second}
+    assert leased_elsewhere == 4
+
+def test_everything_leased_elsewhere(db):
+    _seed(db, 2)
+    claim_campaigns(db, MONTH, "w1")
+    assert claim_campaigns(db, MONTH, "w2") == ([], 2)
+
+def test_expired_lease_can_be_taken_over(db):
+    _seed(db, 1)
+    claim_campaigns(db, MONTH, "w1", lease_seconds=-1)
+    claimed, _ = claim_campaigns(db, MONTH, "w2")
+    assert [doc_id for doc_id, _ in claimed] == ["c0"]
+    assert _lease(db, "c0")["owner"] == "w2"
+    assert _lease(db, "c0")["expires_at"] > time.time()
+
+def test_own_lease_is_renewed(db):
+    _seed(db, 1)
+    claim_campaigns(db, MONTH, "w1")
+    claimed, leased_elsewhere = claim_campaigns(db, MONTH, "w1")
+    assert [doc_id for doc_id, _ in claimed] == ["c0"]
+    assert leased_elsewhere == 0
+
+def test_excluded_campaigns_are_skipped(db):
+    _seed(db, 3)
+    claimed, _ = claim_campaigns(db, MONTH, "w1", exclude={"c1"})
+    assert sorted(doc_id for doc_id, _ in claimed) == ["c0", "c2"]
+
+# Another worker claims every candidate between this worker's query and its
+# claim transaction
+def _lose_every_race(monkeypatch):
+    query = jobs.iter_unscored
+
+    def racing(db, month, **kwargs):
+        docs = list(query(db, month, **kwargs))
+        monkeypatch.setattr(jobs, "iter_unscored", query)
+        claim_campaigns(db, month, "w2")
+        return docs
+
+    monkeypatch.setattr(jobs, "iter_unscored", racing)
+
+def test_lost_races_count_as_leased_elsewhere(db, monkeypatch):
+    _seed(db, 6)
+    _lose_every_race(monkeypatch)
+    assert claim_campaigns(db, MONTH, "w1") == ([], 6)
+
+def test_job_is_not_completed_while_another_worker_scores(db, monkeypatch):
+    _seed(db, 6)
+    job_id = enqueue_scoring_job(db, MONTH, 6)
+    _lose_every_race(monkeypatch)
+    assert run_job(db, FakeGenerativeModel(latency=0), job_id, "w1", log=lambda message: None) is False
+    assert db.collection(jobs.JOBS_COLLECTION).document(job_id).get().get("status") == "running"
+    assert not db.collection("monthly_rollups").document(MONTH).get().exists
+
+def _job(db, job_id):
+    return db.collection(jobs.JOBS_COLLECTION).document(job_id).get().to_dict()
+
+def _quiet(message):
+    pass
+
+def test_failed_round_is_recorded_released_and_retried(db, monkeypatch):
+    _seed(db, 6)
+    job_id = enqueue_scoring_job(db, MONTH, 6)
+    score_campaigns = jobs.score_campaigns
+
+    def broken(model, campaigns):
+        raise RuntimeError("model unavailable")
+
+    monkeypatch.setattr(jobs, "score_campaigns", broken)
+    assert run_job(db, FakeGenerativeModel(latency=0), job_id, "w1", log=_quiet) is False
+    job = _job(db, job_id)
+    assert job["status"] == "running" and job["error_count"] == 1
+    assert "model unavailable" in job["errors"][0]
+    assert all(_lease(db, f"c{i}") is None for i in range(6))
+
+    monkeypatch.setattr(jobs, "score_campaigns", score_campaigns)
+    assert run_job(db, FakeGenerativeModel(latency=0), job_id, "w1", log=_quiet) is True
+    job = _job(db, job_id)
+    assert job["status"] == "completed" and job["scored"] == 6
+
+def test_worker_gives_up_after_repeated_failures(db, monkeypatch):
+    _seed(db, 2)
+    job_id = enqueue_scoring_job(db, MONTH, 2)
+    calls = []
+
+    def unreachable(*args, **kwargs):
+        calls.append(args)
+        raise RuntimeError("deadline exceeded")
+
+    monkeypatch.setattr(jobs, "claim_campaigns", unreachable)
+    assert run_job(db, FakeGenerativeModel(latency=0), job_id, "w1", log=_quiet) is False
+    assert len(calls) == MAX_FAILED_ROUNDS
+    assert _job(db, job_id)["error_count"] == MAX_FAILED_ROUNDS
+
+def test_job_keeps_only_the_latest_errors(db):
+    job_id = enqueue_scoring_job(db, MONTH, 0)
+    for start in range(0, 50, 10):
+        record_job_errors(db, job_id, [f"error {i}" for i in range(start, start + 10)])
+    job = _job(db, job_id)
+    assert job["error_count"] == 50
+    assert job["errors"] == [f"error {i}" for i in range(50 - MAX_JOB_ERRORS, 50)]
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta, timezone
+
+from conftest import MONTH, make_campaign, seed_campaigns
+from utils.leaderboard import (AGGREGATE_COLLECTION, AGGREGATE_TOP_ENTRIES, AGGREGATE_VERSION, fetch_campaign_text,
+                               fetch_leaderboard_page, load_leaderboard, make_entry, rebuild_leaderboard,
+                               record_scores)
+
+def _scored(db, start, count, score=lambda i: (i % 100) / 10):
+    campaigns = {f"c{i}": make_campaign(f"Staff {i}", ai_score=score(i)) for i in range(start, start + count)}
+    seed_campaigns(db, campaigns)
+    return [make_entry(doc_id, data, data["ai_score"]) for doc_id, data in campaigns.items()]
+
+def _aggregate(db):
+    return db.collection(AGGREGATE_COLLECTION).document(MONTH).get().to_dict()
+
+# The first round to record into a month without an aggregate must not
+# drop the campaigns scored before it
+def test_missing_aggregate_is_rebuilt_from_scored_campaigns(db):
+    _scored(db, 0, 51)
+    record_scores(db, MONTH, _scored(db, 51, 49))
+    assert _aggregate(db)["count"] == 100
+
+def test_entries_are_capped_but_totals_cover_every_campaign(db):
+    entries = _scored(db, 0, 250)
+    aggregate = rebuild_leaderboard(db, MONTH)
+    scores = sorted((entry["ai_score"] for entry in entries), reverse=True)
+    assert aggregate["count"] == 250 and sum(aggregate["histogram"]) == 250
+    assert aggregate["sum"] == sum(scores) and aggregate["max"] == scores[0]
+    assert [entry["ai_score"] for entry in aggregate["entries"]] == scores[:AGGREGATE_TOP_ENTRIES]
+
+def test_record_scores_merges_and_rescoring_replaces(db):
+    _scored(db, 0, 3, score=lambda i: 5.0)
+    rebuild_leaderboard(db, MONTH)
+    record_scores(db, MONTH, _scored(db, 3, 2, score=lambda i: 8.0))
+    record_scores(db, MONTH, _scored(db, 0, 1, score=lambda i: 9.0))
+    aggregate = _aggregate(db)
+    assert aggregate["count"] == 5 and aggregate["sum"] == 5.0 * 2 + 8.0 * 2 + 9.0
+    assert aggregate["max"] == 9.0 and aggregate["entries"][0]["doc_id"] == "c0"
+
+def test_older_layout_is_rebuilt_on_read(db):
+    entries = _scored(db, 0, 4)
+    db.collection(AGGREGATE_COLLECTION).document(MONTH).set(
+        {"month": MONTH, "entries": entries[:1], "count": 1, "sum": 0.0, "max": 0.0})
+    aggregate = load_leaderboard(db, MONTH)
+    assert aggregate["version"] == AGGREGATE_VERSION and aggregate["count"] == 4
+
+# Scores written without being recorded (a worker died in between) are
+# picked up once the aggregate has been quiet for the settle window
+def test_drift_is_repaired_after_settling(db):
+    _scored(db, 0, 3)
+    rebuild_leaderboard(db, MONTH)
+    _scored(db, 3, 2)
+    assert load_leaderboard(db, MONTH)["count"] == 3
+    assert load_leaderboard(db, MONTH, settle_seconds=0)["count"] == 5
+
+    _scored(db, 5, 1)
+    db.collection(AGGREGATE_COLLECTION).document(MONTH).update(
+        {"updated_at": datetime.now(timezone.utc) - timedelta(hours=1)})
+    assert load_leaderboard(db, MONTH)["count"] == 6
+
+# Pages follow the ranking, never repeat a campaign, and leave the
+# campaign text behind
+def test_pages_walk_the_ranking_without_campaign_text(db):
+    entries = _scored(db, 0, 23, score=lambda i: i / 3)
+    seed_campaigns(db, {"unscored": make_campaign("Unscored")})
+    rows, cursor = fetch_leaderboard_page(db, MONTH, page_size=10)
+    while cursor is not None:
+        more, cursor = fetch_leaderboard_page(db, MONTH, page_size=10, start_after=cursor)
+        rows += more
+    assert [row["doc_id"] for row in rows] == [entry["doc_id"] for entry in
+                                               sorted(entries, key=lambda entry: entry["ai_score"], reverse=True)]
+    assert all("campaign" not in row for row in rows)
+    assert fetch_campaign_text(db, rows[0]["doc_id"]) == "Buy one get one free on soups"
+
+def test_last_full_page_ends_with_an_empty_one(db):
+    _scored(db, 0, 10)
+    rows, cursor = fetch_leaderboard_page(db, MONTH, page_size=10)
+    assert len(rows) == 10 and cursor is not None
+    assert fetch_leaderboard_page(db, MONTH, page_size=10, start_after=cursor) == ([], None)
@@ -0,0 +1,63 @@
+from benchmarks.fakes import FakeGenerativeModel
+from conftest import MONTH, make_campaign, seed_campaigns
+from utils import jobs
+from utils.jobs import enqueue_scoring_job, run_job
+from utils.near_duplicates import (LSH_BANDS, MAX_ANY_VALUES, band_candidates, index_campaigns, minhash,
+                                   signature_fields, similarity)
+
+SOUP = ("Buy one bowl of our roasted tomato soup and get a second bowl free every weekday afternoon "
+        "between two and five, so the kitchen can use up the tomatoes that arrived this morning before "
+        "they pass their best and regulars get a reason to visit during the quiet hours")
+SALAD = ("Pair any grilled chicken salad with a fresh lemonade for a set price during the lunch rush, "
+         "promoted on the chalkboard by the door and in the weekly newsletter to office workers nearby")
+CURRY = ("Kids eat free with every adult main on Sunday evenings when families order the slow cooked "
+         "lamb curry, which uses the lamb shoulder stock that needs to move before the next delivery")
+
+def _doc(db, doc_id):
+    return db.collection("staff_campaigns").document(doc_id).get().to_dict()
+
+def test_small_edits_stay_similar():
+    assert similarity(minhash(SOUP), minhash(SOUP + " too")) > 0.9
+    assert similarity(minhash(SOUP), minhash(SALAD)) < 0.2
+
+# A round's band keys span several array_contains_any queries; a match
+# whose keys land in a later query is still found
+def test_band_lookups_are_split_into_chunks(db):
+    seed_campaigns(db, {"past": make_campaign("Past", SOUP, ai_score=8.0, **signature_fields(SOUP))})
+    signatures = [minhash(SALAD), minhash(CURRY), minhash(SOUP)]
+    assert len(signatures) * LSH_BANDS > MAX_ANY_VALUES
+    assert list(band_candidates(db, signatures)) == ["past"]
+
+def test_index_campaigns_signs_only_unsigned_docs(db):
+    seed_campaigns(db, {"old": make_campaign("Old", SOUP),
+                        "new": make_campaign("New", SALAD, **signature_fields(SALAD))})
+    assert index_campaigns(db) == 1
+    assert _doc(db, "old")["lsh_bands"] == signature_fields(SOUP)["lsh_bands"]
+
+# Near-duplicates of a scored campaign reuse its score; duplicates within a
+# round wait for the first copy's score. Only distinct campaigns reach the model.
+def test_duplicates_reuse_scores_instead_of_model_calls(db, monkeypatch):
+    seed_campaigns(db, {
+        "past": make_campaign("Past", SOUP, month="2024-04", ai_score=8.0, **signature_fields(SOUP)),
+        "again": make_campaign("Again", SOUP + " too"),
+        "salad": make_campaign("Salad", SALAD),
+        "salad_copy": make_campaign("Copy", SALAD),
+        "curry": make_campaign("Curry", CURRY),
+    })
+    sent = []
+    score_campaigns = jobs.score_campaigns
+
+    def recording(model, campaigns):
+        sent.extend(doc_id for doc_id, _ in campaigns)
+        return score_campaigns(model, campaigns)
+
+    monkeypatch.setattr(jobs, "score_campaigns", recording)
+    job_id = enqueue_scoring_job(db, MONTH, 4)
+    assert run_job(db, FakeGenerativeModel(latency=0), job_id, "w1", log=lambda message: None)
+
+    assert sorted(sent) == ["curry", "salad"]
+    assert _doc(db, "again")["ai_score"] == 8.0 and _doc(db, "again")["duplicate_of"] == "past"
+    assert _doc(db, "salad_copy")["ai_score"] == _doc(db, "salad")["ai_score"]
+    assert _doc(db, "salad_copy")["duplicate_of"] == "salad"
+    job = db.collection(jobs.JOBS_COLLECTION).document(job_id).get().to_dict()
+    assert (job["scored"], job["reused"], job["status"]) == (4, 2, "completed")
@@ -0,0 +1,55 @@
+import time
+
+from benchmarks.fakes import FakeFirestore
+from conftest import MONTH, make_campaign, seed_campaigns
+from utils.campaigns import count_campaigns
+from utils.leaderboard import rebuild_leaderboard
+from utils.outlets import chain_summary, fan_out, get_outlet_db
+from utils.snapshot import close_snapshots, get_snapshot
+
+def test_outlet_collections_are_scoped(db):
+    seed_campaigns(get_outlet_db(db, "north"), {"c0": make_campaign("North")})
+    assert db.collection("outlets").document("north").collection("staff_campaigns").document("c0").get().exists
+    assert count_campaigns(get_outlet_db(db, "north"), MONTH) == (1, 0)
+    assert count_campaigns(get_outlet_db(db, "south"), MONTH) == (0, 0)
+    assert count_campaigns(db, MONTH) == (0, 0)
+
+def test_outlet_clients_are_shared_per_root(db):
+    assert get_outlet_db(db, None) is db
+    assert get_outlet_db(db, "north") is get_outlet_db(db, "north")
+    assert get_outlet_db(FakeFirestore(), "north").db is not db
+
+# count_campaigns is two round trips per outlet
+def test_fan_out_reads_outlets_in_parallel():
+    db = FakeFirestore(latency=0.1)
+    outlets = [f"outlet{i}" for i in range(6)]
+    sequential = 0.1 * 2 * len(outlets)
+    began = time.monotonic()
+    results = fan_out(db, outlets, count_campaigns, MONTH)
+    assert time.monotonic() - began < sequential / 2
+    assert results == {outlet: (0, 0) for outlet in outlets}
+
+def test_chain_summary_adds_up_the_outlets(db):
+    seed_campaigns(get_outlet_db(db, "north"), {"n0": make_campaign("A", ai_score=6.0),
+                                                "n1": make_campaign("B", ai_score=9.0),
+                                                "n2": make_campaign("C")})
+    seed_campaigns(get_outlet_db(db, "south"), {"s0": make_campaign("D", ai_score=7.0)})
+    rebuild_leaderboard(get_outlet_db(db, "north"), MONTH)
+
+    chain = chain_summary(db, MONTH, outlets=["north", "south"])
+    assert (chain["count"], chain["sum"], chain["max"], chain["submitted"]) == (3, 22.0, 9.0, 4)
+    assert [(entry["outlet"], entry["ai_score"]) for entry in chain["entries"]] == \
+        [("north", 9.0), ("south", 7.0), ("north", 6.0)]
+    assert chain["outlets"]["north"] == {"submitted": 3, "scored": 2, "avg_score": 7.5, "max_score": 9.0}
+
+def test_snapshots_are_kept_per_outlet(db):
+    close_snapshots()
+    try:
+        for outlet, dish in (("north", "Soup"), ("south", "Curry")):
+            get_outlet_db(db, outlet).collection("menu").document("d0").set({"name": dish, "ingredients": []})
+        north = get_snapshot(get_outlet_db(db, "north"), "menu")
+        south = get_snapshot(get_outlet_db(db, "south"), "menu")
+        assert north is not south
+        assert list(north.frame()["name"]) == ["Soup"] and list(south.frame()["name"]) == ["Curry"]
+    finally:
+        close_snapshots()
@@ -0,0 +1,70 @@
+import os
+from datetime import datetime
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import utils.firebase
+import utils.gemini
+from benchmarks.fakes import FakeGenerativeModel
+from conftest import make_campaign, seed_campaigns
+from utils.leaderboard import rebuild_leaderboard
+from utils.rollups import write_rollup
+from utils.snapshot import close_snapshots
+
+PAGE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pages", "campaign_portal.py")
+
+# The page shows the current month
+CURRENT_MONTH = datetime.now().strftime("%Y-%m")
+
+@pytest.fixture
+def page(db, monkeypatch):
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    close_snapshots()
+    monkeypatch.setattr(utils.firebase, "_db", db)
+    monkeypatch.setattr(utils.gemini, "_model", FakeGenerativeModel(latency=0))
+    app = AppTest.from_file(PAGE, default_timeout=60)
+    yield app
+    close_snapshots()
+
+@pytest.fixture
+def app(db, page):
+    seed_campaigns(db, {f"c{i}": make_campaign(f"Staff {i}", month=CURRENT_MONTH, ai_score=5 + i / 2)
+                        for i in range(6)})
+    rebuild_leaderboard(db, CURRENT_MONTH)
+    write_rollup(db, CURRENT_MONTH)
+    return page
+
+def _charts(app):
+    return app.get("plotly_chart")
+
+# Charts are only built for the open tab, so the first paint draws none
+def test_first_paint_builds_no_charts(app):
+    app.run()
+    assert not app.exception
+    assert _charts(app) == []
+
+@pytest.mark.parametrize("tab, charts", [("🏆 Leaderboard", 1), ("📈 Trends", 4)])
+def test_open_tab_builds_its_charts(app, tab, charts):
+    app.session_state["portal_tab"] = tab
+    app.run()
+    assert not app.exception
+    assert len(_charts(app)) == charts
+
+def test_admin_panel_migrates_legacy_campaigns_before_queueing(db, page):
+    legacy = {f"l{i}": make_campaign(f"Legacy {i}", month=CURRENT_MONTH, **({"ai_score": 6.0} if i < 2 else {}))
+              for i in range(5)}
+    for data in legacy.values():
+        del data["scored"]
+    seed_campaigns(db, legacy)
+    page.run()
+    assert any("before scoring progress was tracked" in warning.value for warning in page.warning)
+
+    page.button(key="admin_score_button").click().run()
+    assert not page.exception
+    (job,) = [doc.to_dict() for doc in db.collection("scoring_jobs").stream()]
+    assert (job["total"], job["skipped"]) == (3, 2)
+    assert all("scored" in doc.to_dict() for doc in db.collection("staff_campaigns").stream())
+    assert not page.warning
@@ -0,0 +1,114 @@
+import time
+
+import pytest
+
+from utils import scoring
+from benchmarks.fakes import FakeApiError, FakeGenerativeModel
+from utils.gemini import build_scoring_prompt
+from utils.scoring import TokenBucket, call_with_backoff, plan_batches, score_campaigns
+
+@pytest.fixture(autouse=True)
+def no_backoff_sleep(monkeypatch):
+    monkeypatch.setattr(scoring, "BACKOFF_BASE_SECONDS", 0.0)
+
+@pytest.fixture
+def limiter():
+    return TokenBucket(requests_per_minute=60_000)
+
+# Callable raising the given errors in turn, then returning "ok"
+def flaky(*errors):
+    calls = []
+
+    def fn():
+        calls.append(None)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return "ok"
+    return fn, calls
+
+def test_backoff_retries_retryable_errors(limiter):
+    fn, calls = flaky(FakeApiError(503), FakeApiError(500))
+    assert call_with_backoff(fn, limiter) == "ok"
+    assert len(calls) == 3
+
+def test_backoff_raises_non_retryable_at_once(limiter):
+    fn, calls = flaky(FakeApiError(400))
+    with pytest.raises(FakeApiError):
+        call_with_backoff(fn, limiter)
+    assert len(calls) == 1
+
+def test_backoff_gives_up_after_max_retries(limiter):
+    fn, calls = flaky(*[FakeApiError(503)] * 4)
+    with pytest.raises(FakeApiError):
+        call_with_backoff(fn, limiter, max_retries=2)
+    assert len(calls) == 3
+
+def test_rate_limit_throttles_then_recovers(limiter):
+    fn, _ = flaky(FakeApiError(429))
+    call_with_backoff(fn, limiter)
+    assert limiter.rate == pytest.approx(limiter.max_rate / 2 * 1.1)
+
+def test_server_errors_do_not_throttle(limiter):
+    fn, _ = flaky(FakeApiError(503))
+    call_with_backoff(fn, limiter)
+    assert limiter.rate == limiter.max_rate
+
+def test_throttle_halves_rate_down_to_a_floor():
+    bucket = TokenBucket(requests_per_minute=600)
+    for _ in range(10):
+        bucket.throttle()
+    assert bucket.rate == bucket.max_rate / 16
+    for _ in range(100):
+        bucket.recover()
+    assert bucket.rate == bucket.max_rate
+
+def test_bucket_starts_full_then_waits_for_refill():
+    bucket = TokenBucket(requests_per_minute=600, capacity=2)
+    started = time.monotonic()
+    for _ in range(3):
+        bucket.acquire()
+    assert time.monotonic() - started >= 0.09
+
+JOBS = [(f"c{i}", f"Campaign number {i} with a soup discount") for i in range(5)]
+
+def test_score_campaigns_scores_each_job(limiter):
+    model = FakeGenerativeModel(latency=0.01)
+    results = {key: (score, error) for key, score, error in
+               score_campaigns(model, JOBS, limiter=limiter, batch_token_budget=0, use_cache=False)}
+    assert results == {key: (model.score(build_scoring_prompt(text)), None) for key, text in JOBS}
+    assert model.calls == len(JOBS)
+
+def test_score_campaigns_reports_single_failures(limiter):
+    model = FakeGenerativeModel(latency=0, error_rate=1.0, rate_limit_share=0.0)
+    results = list(score_campaigns(model, JOBS[:2], limiter=limiter, batch_token_budget=0, use_cache=False))
+    assert len(results) == 2
+    assert all(score is None and isinstance(error, FakeApiError) for _, score, error in results)
+
+def test_plan_batches_respects_item_limit():
+    jobs = [(str(i), "short campaign") for i in range(45)]
+    batches = plan_batches(jobs, token_budget=100_000, max_items=20)
+    assert [len(batch) for batch in batches] == [20, 20, 5]
+    assert [key for batch in batches for key, _ in batch] == [key for key, _ in jobs]
+
+# Fails every batched request with a non-retryable error
+class BatchFailingModel(FakeGenerativeModel):
+    def respond(self, prompt, generation_config=None):
+        if "Campaigns:" in prompt:
+            raise FakeApiError(400, "bad batch")
+        return super().respond(prompt, generation_config)
+
+def test_score_campaigns_batches(limiter):
+    model = FakeGenerativeModel(latency=0)
+    results = list(score_campaigns(model, JOBS, limiter=limiter, use_cache=False))
+    assert sorted(key for key, _, _ in results) == [key for key, _ in JOBS]
+    assert all(error is None and 1 <= score <= 10 for _, score, error in results)
+    assert model.calls == 1
+
+@pytest.mark.parametrize("model", [BatchFailingModel(latency=0), FakeGenerativeModel(latency=0, drop_rate=1.0)],
+                         ids=["failed", "dropped"])
+def test_score_campaigns_falls_back_to_single_requests(model, limiter):
+    results = {key: (score, error) for key, score, error in
+               score_campaigns(model, JOBS, limiter=limiter, use_cache=False)}
+    assert set(results) == {key for key, _ in JOBS}
+    assert all(error is None for _, error in results.values())
+    assert model.calls == 1 + len(JOBS)
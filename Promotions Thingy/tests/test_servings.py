@@ -0,0 +1,51 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_inventory, make_menu
+from utils.dish_index import DishIndex
+from utils.inventory_index import InventoryIndex
+from utils.servings import RecipeMatrix, campaign_end, duration_days, required_servings
+
+MENU = pd.DataFrame({
+    "name": ["Soup", "Salad", "Toast", "Plain"],
+    "ingredients": ["Tomato, Onion", ["lettuce", "tomato"], "bread, butter", []],
+    "ingredient_quantities": [{"Tomato": "200 g", "onion": "0.1 kg"}, {"lettuce": "50 g"}, None, None],
+})
+
+def test_servings_are_the_scarcest_ingredient():
+    matrix = RecipeMatrix(MENU)
+    servings = matrix.servings(pd.Series({"tomato": 1000.0, "onion": 250.0, "lettuce": 120.0, "bread": 1.0}))
+    assert servings[:3].tolist() == [2, 2, 0]
+    assert np.isinf(servings[3])
+
+def test_dishes_with_servings():
+    matrix = RecipeMatrix(MENU)
+    stock = pd.Series({"tomato": 1000.0, "onion": 250.0, "lettuce": 120.0, "bread": 3.0, "butter": 1.0})
+    assert matrix.dishes_with_servings(stock, 2) == ["Soup", "Salad", "Toast", "Plain"]
+    assert matrix.dishes_with_servings(stock, 3) == ["Toast", "Plain"]
+    assert matrix.dishes_with_servings(stock.drop("butter"), 1) == ["Soup", "Salad", "Plain"]
+
+# The submit path relies on servings alone: a dish with any ingredient out
+# of stock has zero servings, so it is never offered
+@pytest.mark.parametrize("duration", ["Today Only", "This Week", "Extended (1 week)"])
+def test_servings_imply_every_ingredient_in_stock(duration):
+    menu_df = make_menu(200, ingredients=80)
+    stock = InventoryIndex(make_inventory(2000, ingredients=80)).stock_through(duration)
+    feasible = set(DishIndex(menu_df).possible_for(stock.index.tolist()))
+    offered = RecipeMatrix(menu_df).dishes_with_servings(stock, required_servings(duration))
+    assert offered
+    assert set(offered) <= feasible
+
+def test_name_only_menus_match_the_dish_index():
+    menu_df = make_menu(200, ingredients=80).drop(columns="ingredient_quantities")
+    stock = InventoryIndex(make_inventory(2000, ingredients=80)).stock_at()
+    assert RecipeMatrix(menu_df).dishes_with_servings(stock) == DishIndex(menu_df).possible_for(stock.index.tolist())
+
+def test_this_week_runs_until_sunday():
+    wednesday = datetime(2024, 5, 15)
+    assert duration_days("This Week", wednesday) == 5
+    assert campaign_end("This Week", wednesday).date() == datetime(2024, 5, 19).date()
+    assert required_servings("Weekend Special", wednesday, daily_servings=3) == 6
@@ -0,0 +1,52 @@
+import threading
+import time
+
+import pytest
+
+from benchmarks.fakes import FakeFirestore
+from utils.snapshot import close_snapshots, get_snapshot
+
+@pytest.fixture(autouse=True)
+def fresh_registry():
+    close_snapshots()
+    yield
+    close_snapshots()
+
+def _menu_db(latency=0.0, dishes=3):
+    db = FakeFirestore()
+    for i in range(dishes):
+        db.collection("menu").document(f"dish_{i}").set({"name": f"Dish {i}", "ingredients": ["rice"]})
+    db.latency, db.reads = latency, 0
+    return db
+
+def test_snapshot_is_shared_and_derived_once():
+    db = _menu_db()
+    builds = []
+    snapshot = get_snapshot(db, "menu")
+    assert get_snapshot(db, "menu") is snapshot
+    assert len(snapshot.frame()) == 3
+    for _ in range(2):
+        snapshot.derived("names", lambda frame: builds.append(None) or sorted(frame["name"]))
+    assert len(builds) == 1
+
+def test_slow_first_read_does_not_block_other_collections():
+    slow, fast = _menu_db(latency=0.5), _menu_db()
+    started = threading.Thread(target=get_snapshot, args=(slow, "menu"))
+    started.start()
+    time.sleep(0.05)
+    began = time.monotonic()
+    get_snapshot(fast, "ingredient_inventory")
+    assert time.monotonic() - began < 0.25
+    started.join()
+
+def test_concurrent_first_use_reads_once():
+    db = _menu_db(latency=0.1)
+    snapshots = []
+    threads = [threading.Thread(target=lambda: snapshots.append(get_snapshot(db, "menu"))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(snapshot) for snapshot in snapshots}) == 1
+    assert snapshots[0].version == 1
+    assert db.reads == 3
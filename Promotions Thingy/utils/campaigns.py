@@ -0,0 +1,115 @@
+import threading
+import time
+
+from utils.telemetry import span
+
+CAMPAIGNS_COLLECTION = "staff_campaigns"
+
+# Unscored campaigns fetched per page
+UNSCORED_PAGE_SIZE = 100
+
+# Seconds before a month roster is re-read to pick up other servers' writes
+ROSTER_TTL_SECONDS = 300
+# Fields the duplicate-submission warning shows, loaded with the roster
+ROSTER_FIELDS = ["timestamp", "promotion_type"]
+
+_rosters = {}
+_rosters_lock = threading.Lock()
+
+def _month_query(db, month):
+    return db.collection(CAMPAIGNS_COLLECTION).where("month", "==", month)
+
+def _count(query):
+    return query.count(alias="count").get()[0][0].value
+
+# (total, scored) for a month from two count() aggregations
+def count_campaigns(db, month):
+    query = _month_query(db, month)
+    with span("firestore.count_campaigns"):
+        return _count(query), _count(query.where("scored", "==", True))
+
+# Campaigns of a month without the scored flag (written before it existed),
+# from one more count() next to count_campaigns()' (total, scored). The
+# unscored cursor can't see them until backfill_scored_flags() has run.
+def count_unflagged(db, month, total, scored):
+    with span("firestore.count_campaigns"):
+        return total - scored - _count(_month_query(db, month).where("scored", "==", False))
+
+# One page of unscored campaigns; pass the returned cursor back as
+# start_after, it is None after the last page
+def unscored_page(db, month, page_size=UNSCORED_PAGE_SIZE, start_after=None, fields=None):
+    query = _month_query(db, month).where("scored", "==", False).limit(page_size)
+    if fields is not None:
+        query = query.select(fields)
+    if start_after is not None:
+        query = query.start_after(start_after)
+    docs = list(query.stream())
+    return docs, docs[-1] if len(docs) == page_size else None
+
+# Every unscored campaign of a month, page by page
+def iter_unscored(db, month, page_size=UNSCORED_PAGE_SIZE, fields=None):
+    cursor = None
+    while True:
+        docs, cursor = unscored_page(db, month, page_size, cursor, fields)
+        yield from docs
+        if cursor is None:
+            return
+
+# Set the indexed `scored` flag on docs written before it existed. A one-time
+# migration, as it reads the whole month: the Admin Panel runs it before
+# queueing a month that count_unflagged() reports, and
+# scoring_worker.py --backfill-scored runs it by hand.
+def backfill_scored_flags(db, month):
+    batch, pending, updated = db.batch(), 0, 0
+    for doc in _month_query(db, month).select(["ai_score", "scored"]).stream():
+        data = doc.to_dict()
+        if "scored" in data:
+            continue
+        batch.update(doc.reference, {"scored": "ai_score" in data})
+        pending += 1
+        if pending == 400:
+            batch.commit()
+            batch, updated, pending = db.batch(), updated + pending, 0
+    if pending:
+        batch.commit()
+    return updated + pending
+
+# Campaign doc ids submitted in a month, with the ROSTER_FIELDS of each.
+# Loaded with one projected query and updated on our own writes, so the
+# Submit tab's duplicate check is an in-memory lookup.
+class MonthRoster:
+    def __init__(self, db, month, ttl=ROSTER_TTL_SECONDS):
+        self.db = db
+        self.month = month
+        self.ttl = ttl
+        self.entries = {}
+        self.loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        with span("firestore.roster_read") as fields:
+            entries = {doc.id: doc.to_dict() for doc in _month_query(self.db, self.month).select(ROSTER_FIELDS).stream()}
+            fields["docs"] = len(entries)
+        with self._lock:
+            self.entries = entries
+            self.loaded_at = time.time()
+
+    # Roster fields of a submitted campaign, or None if it isn't on the roster
+    def get(self, doc_id):
+        if time.time() - self.loaded_at > self.ttl:
+            self.refresh()
+        with self._lock:
+            return self.entries.get(doc_id)
+
+    def add(self, doc_id, data):
+        with self._lock:
+            self.entries[doc_id] = {field: data.get(field) for field in ROSTER_FIELDS}
+
+# Shared roster for a month (per outlet), loaded on first use
+def get_roster(db, month, ttl=ROSTER_TTL_SECONDS):
+    key = (getattr(db, "outlet", None), month)
+    with _rosters_lock:
+        roster = _rosters.get(key)
+        if roster is None or roster.db is not db:
+            roster = _rosters[key] = MonthRoster(db, month, ttl)
+    return roster
@@ -0,0 +1,55 @@
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.leaderboard import score_histogram
+
+# Up to this many staff the score chart has one bar each; above it the
+# scores are binned, so the figure stays the same size however many there are
+CHART_BAR_LIMIT = int(os.environ.get("CHART_BAR_LIMIT", 60))
+
+CHART_LAYOUT = dict(height=400, plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', font_color='#e2e8f0')
+
+# Digest of the (name, score) pairs or histogram a chart is drawn from; the
+# cache key for its figure
+def scores_digest(names, scores, histogram=()):
+    digest = hashlib.blake2b(digest_size=16)
+    for name, score in zip(names, scores):
+        digest.update(f"{name}\0{score}\n".encode("utf-8"))
+    digest.update(",".join(map(str, histogram)).encode("utf-8"))
+    return digest.hexdigest()
+
+# Score distribution figure (plotly is only imported when a chart is built).
+# Pass the leaderboard aggregate's histogram when only its top entries are
+# at hand; its equal-width bins span 0-10.
+def score_figure(names, scores, histogram=None):
+    if histogram is None and len(scores) <= CHART_BAR_LIMIT:
+        import plotly.express as px
+        fig = px.bar(
+            pd.DataFrame({"name": names, "ai_score": scores}),
+            x='name',
+            y='ai_score',
+            color='ai_score',
+            color_continuous_scale='Blues',
+            title="Campaign Scores by Staff Member"
+        )
+        fig.update_layout(xaxis_title="Staff Member", yaxis_title="AI Score", showlegend=False, **CHART_LAYOUT)
+        return fig
+
+    import plotly.graph_objects as go
+    counts = np.asarray(score_histogram(scores) if histogram is None else histogram)
+    edges = np.linspace(0, 10, len(counts) + 1)
+    centers = (edges[:-1] + edges[1:]) / 2
+    fig = go.Figure(go.Bar(
+        x=centers,
+        y=counts,
+        width=edges[1] - edges[0],
+        marker=dict(color=centers, colorscale='Blues'),
+        customdata=np.stack([edges[:-1], edges[1:]], axis=1),
+        hovertemplate="Score %{customdata[0]:.1f}-%{customdata[1]:.1f}: %{y} campaigns<extra></extra>",
+    ))
+    fig.update_layout(title=f"Score Distribution across {counts.sum():,} Staff Members", xaxis_title="AI Score",
+                      yaxis_title="Campaigns", bargap=0.05, **CHART_LAYOUT)
+    return fig
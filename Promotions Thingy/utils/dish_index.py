@@ -0,0 +1,66 @@
+import threading
+from collections import defaultdict
+
+# Menu docs store ingredients either as a list or as "a, b, c"
+def split_ingredients(value):
+    if isinstance(value, str):
+        value = value.split(',')
+    return [i.strip().lower() for i in value or [] if i and i.strip()]
+
+# Inverted ingredient -> dish index over a menu.
+# Each dish keeps a count of its ingredients that are out of stock; a dish
+# is feasible when that count is zero, so stock changes only touch the
+# dishes in the changed ingredient's posting list.
+class DishIndex:
+    def __init__(self, menu_df):
+        self.dish_names = menu_df['name'].tolist()
+        self.postings = defaultdict(set)
+        self.required = []
+        for dish_id, ingredients in enumerate(menu_df['ingredients']):
+            required = set(split_ingredients(ingredients))
+            self.required.append(required)
+            for ingredient in required:
+                self.postings[ingredient].add(dish_id)
+
+        self.in_stock = set()
+        self.missing = [len(required) for required in self.required]
+        self.feasible = {dish_id for dish_id, count in enumerate(self.missing) if count == 0}
+        self._lock = threading.Lock()
+
+    # Replace the whole in-stock set, touching only ingredients that changed
+    def set_stock(self, available_ingredients):
+        available = set(available_ingredients)
+        for ingredient in self.in_stock - available:
+            self.remove_ingredient(ingredient)
+        for ingredient in available - self.in_stock:
+            self.add_ingredient(ingredient)
+
+    def add_ingredient(self, ingredient):
+        ingredient = ingredient.strip().lower()
+        if ingredient in self.in_stock:
+            return
+        self.in_stock.add(ingredient)
+        for dish_id in self.postings.get(ingredient, ()):
+            self.missing[dish_id] -= 1
+            if self.missing[dish_id] == 0:
+                self.feasible.add(dish_id)
+
+    def remove_ingredient(self, ingredient):
+        ingredient = ingredient.strip().lower()
+        if ingredient not in self.in_stock:
+            return
+        self.in_stock.discard(ingredient)
+        for dish_id in self.postings.get(ingredient, ()):
+            if self.missing[dish_id] == 0:
+                self.feasible.discard(dish_id)
+            self.missing[dish_id] += 1
+
+    # Feasible dish names in menu order
+    def possible_dishes(self):
+        return [self.dish_names[dish_id] for dish_id in sorted(self.feasible)]
+
+    # Atomic set_stock + possible_dishes, for indexes shared between sessions
+    def possible_for(self, available_ingredients):
+        with self._lock:
+            self.set_stock(available_ingredients)
+            return self.possible_dishes()
@@ -0,0 +1,75 @@
+import os
+from datetime import timedelta
+
+import numpy as np
+
+from utils.gemini import estimate_tokens
+from utils.servings import campaign_end
+
+# Tokens the dish list may take up in the generation prompt, however big the menu
+PROMPT_DISH_TOKEN_BUDGET = int(os.environ.get("PROMPT_DISH_TOKEN_BUDGET", 400))
+
+# Lots expiring within this many days after the campaign ends are about to expire
+EXPIRY_HORIZON_DAYS = 3
+
+# What puts a dish first for each campaign goal:
+#   expiring - uses an ingredient whose stock mostly expires soon after the campaign
+#   surplus  - uses an ingredient with the most servings' worth of stock
+#   servings - can be served the most times over the campaign
+GOAL_SIGNALS = {
+    "Reduce Food Wastage": "expiring",
+    "Clear Excess Inventory": "surplus",
+}
+DEFAULT_SIGNAL = "servings"
+
+# Tokens a dish name takes in the prompt's list, with its ", " separator
+def dish_tokens(name):
+    return estimate_tokens(name) + 1
+
+# Token count per dish name, built once per menu snapshot version
+def dish_token_counts(menu_df):
+    return {name: dish_tokens(name) for name in menu_df['name']}
+
+# Share of each ingredient's campaign stock (aligned with the recipe
+# vocabulary) that expires within EXPIRY_HORIZON_DAYS of the campaign end
+def expiring_share(inventory_index, recipe_matrix, campaign_duration, today=None):
+    end = campaign_end(campaign_duration, today)
+    usable = recipe_matrix.stock_vector(inventory_index.stock_at(end))
+    lasting = recipe_matrix.stock_vector(inventory_index.stock_at(end + timedelta(days=EXPIRY_HORIZON_DAYS)))
+    share = np.zeros(len(usable))
+    np.divide(usable - lasting, usable, out=share, where=usable > 0)
+    return share
+
+# Relevance of every menu dish (recipe_matrix order) to a campaign goal
+def dish_scores(goal, recipe_matrix, inventory_index, campaign_duration, today=None):
+    signal = GOAL_SIGNALS.get(goal, DEFAULT_SIGNAL)
+    if signal == "expiring":
+        share = expiring_share(inventory_index, recipe_matrix, campaign_duration, today)
+        return recipe_matrix.per_dish(share[recipe_matrix.columns], np.maximum, 0.0)
+
+    stock = inventory_index.stock_through(campaign_duration, today)
+    if signal == "surplus":
+        ratios = recipe_matrix.line_ratios(stock)
+        scores = recipe_matrix.per_dish(np.where(np.isfinite(ratios), ratios, 0.0), np.maximum, 0.0)
+    else:
+        scores = recipe_matrix.servings(stock)
+    # Dishes without amounts say nothing about quantity
+    scores[~np.isfinite(scores)] = 0
+    return scores
+
+# Feasible dishes, most relevant to the goal first; ties keep menu order
+def rank_dishes(dishes, goal, recipe_matrix, inventory_index, campaign_duration, today=None):
+    scores = dict(zip(recipe_matrix.dish_names,
+                      dish_scores(goal, recipe_matrix, inventory_index, campaign_duration, today)))
+    return sorted(dishes, key=lambda dish: -scores.get(dish, 0.0))
+
+# Leading dishes whose names fit in the token budget (always at least one)
+def fit_to_budget(dishes, token_counts, budget=PROMPT_DISH_TOKEN_BUDGET):
+    selected, used = [], 0
+    for dish in dishes:
+        tokens = token_counts.get(dish) or dish_tokens(dish)
+        if selected and used + tokens > budget:
+            break
+        selected.append(dish)
+        used += tokens
+    return selected
@@ -0,0 +1,97 @@
+import csv
+import gzip
+import io
+from datetime import datetime
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from firebase_admin import firestore
+
+from utils.campaigns import CAMPAIGNS_COLLECTION
+from utils.telemetry import span
+
+# Campaign fields in the full leaderboard export
+EXPORT_COLUMNS = ["name", "promotion_type", "goal", "target_audience", "campaign_duration", "ai_score", "campaign"]
+
+# Docs fetched per cursor page; only one page of campaign text is held at a time
+EXPORT_PAGE_SIZE = 500
+
+# Download label -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    "CSV (gzip)": ("csv.gz", "application/gzip"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+_STRING_COLUMNS = [column for column in EXPORT_COLUMNS if column != "ai_score"]
+EXPORT_SCHEMA = pa.schema(
+    [("month", pa.string()), ("rank", pa.int64())]
+    + [(column, pa.float64() if column == "ai_score" else pa.string()) for column in EXPORT_COLUMNS])
+
+# The `count` months up to and including `end` ("YYYY-MM"), oldest first
+def recent_months(count, end=None):
+    year, month = map(int, (end or datetime.now().strftime("%Y-%m")).split("-"))
+    months = []
+    for _ in range(count):
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return months[::-1]
+
+# Scored campaigns of each month, best first, as pages of row dicts with
+# month and rank. Pages follow cursors over the month + ai_score index
+# the leaderboard already uses.
+def iter_export_pages(db, months, page_size=EXPORT_PAGE_SIZE):
+    for month in months:
+        query = (db.collection(CAMPAIGNS_COLLECTION)
+                 .where("month", "==", month)
+                 .order_by("ai_score", direction=firestore.Query.DESCENDING)
+                 .select(EXPORT_COLUMNS)
+                 .limit(page_size))
+        cursor, rank = None, 0
+        while True:
+            with span("firestore.export_page") as fields:
+                docs = list((query.start_after(cursor) if cursor is not None else query).stream())
+                fields["docs"] = len(docs)
+            rows = []
+            for doc in docs:
+                rank += 1
+                data = doc.to_dict()
+                row = {"month": month, "rank": rank, "ai_score": data.get("ai_score")}
+                row.update({column: _text(data.get(column)) for column in _STRING_COLUMNS})
+                rows.append(row)
+            if rows:
+                yield rows
+            if len(docs) < page_size:
+                break
+            cursor = docs[-1]
+
+def _text(value):
+    return None if value is None else str(value)
+
+def _write_csv_gz(pages, out):
+    count = 0
+    with gzip.GzipFile(fileobj=out, mode="wb") as compressed, \
+            io.TextIOWrapper(compressed, encoding="utf-8", newline="") as text:
+        writer = csv.DictWriter(text, fieldnames=EXPORT_SCHEMA.names)
+        writer.writeheader()
+        for rows in pages:
+            writer.writerows(rows)
+            count += len(rows)
+    return count
+
+def _write_parquet(pages, out):
+    count = 0
+    with pq.ParquetWriter(out, EXPORT_SCHEMA, compression="zstd") as writer:
+        for rows in pages:
+            writer.write_table(pa.Table.from_pylist(rows, schema=EXPORT_SCHEMA))
+            count += len(rows)
+    return count
+
+_WRITERS = {"csv.gz": _write_csv_gz, "parquet": _write_parquet}
+
+# Compressed export of the scored campaigns of `months`, written page by
+# page so the process holds one page of rows plus the compressed output
+def export_campaigns(db, months, extension="csv.gz", page_size=EXPORT_PAGE_SIZE):
+    out = io.BytesIO()
+    with span("export.campaigns", format=extension) as fields:
+        fields["items"] = _WRITERS[extension](iter_export_pages(db, months, page_size), out)
+    return out.getvalue()
@@ -1,10 +1,18 @@
+import threading
+
 import firebase_admin
 from firebase_admin import credentials, firestore
 
+from utils.telemetry import span
+
 _db = None
 
+# Initialize once per process; later calls return the same client
+
 def init_firebase(json_path: str = 'restaurant-data-backend-firebase-adminsdk-fbsvc-8b7fe2120f (2).json'):
     global _db
+    if _db is not None:
+        return _db
     if not firebase_admin._apps:
         cred = credentials.Certificate(json_path)
         firebase_admin.initialize_app(cred)
@@ -15,3 +23,89 @@ def get_firestore():
     if _db is None:
         raise ValueError("Firestore has not been initialized. Call init_firebase() first.")
     return _db
+
+# Run fn(transaction) in a transaction and return its result. Real clients
+# go through firestore.transactional, which retries on contention; other
+# clients (the in-memory fake) run it themselves.
+def run_transaction(db, fn):
+    transaction = db.transaction()
+    if isinstance(transaction, firestore.Transaction):
+        return firestore.transactional(fn)(transaction)
+    return transaction.run(fn)
+
+# Writes per WriteBatch (Firestore allows 500) and the longest a buffered
+# write waits before the batch is flushed
+BATCH_MAX_WRITES = 400
+BATCH_MAX_SECONDS = 2.0
+
+# Buffers document updates and commits them as WriteBatches, flushing by
+# count or on a timer max_seconds after the first buffered write, so a slow
+# producer never leaves writes waiting. Results are (doc_id, fields, error)
+# tuples; those of a timed flush come back from the next update() or flush().
+class BatchUpdater:
+    def __init__(self, db, collection: str, max_writes: int = BATCH_MAX_WRITES,
+                 max_seconds: float = BATCH_MAX_SECONDS):
+        self.db = db
+        self.collection = collection
+        self.max_writes = max_writes
+        self.max_seconds = max_seconds
+        self.pending = []
+        self._results = []
+        self._timer = None
+        self._lock = threading.Lock()
+
+    # Queue an update; returns the results of any flush since the last call
+    def update(self, doc_id: str, fields: dict):
+        with self._lock:
+            self.pending.append((doc_id, fields))
+            if len(self.pending) >= self.max_writes:
+                self._flush()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.max_seconds, self._flush_on_timer)
+                self._timer.daemon = True
+                self._timer.start()
+            return self._take_results()
+
+    # Commit whatever is buffered; returns every result not yet handed back
+    def flush(self):
+        with self._lock:
+            self._flush()
+            return self._take_results()
+
+    def _flush_on_timer(self):
+        with self._lock:
+            self._flush()
+
+    def _take_results(self):
+        results, self._results = self._results, []
+        return results
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self.pending = self.pending, []
+        if pending:
+            self._results += self._commit(pending)
+
+    def _commit(self, pending):
+        collection = self.db.collection(self.collection)
+        batch = self.db.batch()
+        for doc_id, fields in pending:
+            batch.update(collection.document(doc_id), fields)
+        try:
+            with span("firestore.batch_commit", writes=len(pending)):
+                batch.commit()
+            return [(doc_id, fields, None) for doc_id, fields in pending]
+        except Exception:
+            pass
+
+        # A batch is all-or-nothing, so write individually to isolate the failures
+        results = []
+        for doc_id, fields in pending:
+            try:
+                collection.document(doc_id).update(fields)
+                results.append((doc_id, fields, None))
+            except Exception as e:
+                results.append((doc_id, fields, e))
+        return results
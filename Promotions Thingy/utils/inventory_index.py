@@ -0,0 +1,49 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from utils.inventory_utils import normalize_inventory
+from utils.servings import campaign_end
+
+# Usable inventory lots sorted by expiry date.
+# A lot is usable at time T when it expires after T, so the lots usable at
+# T are a suffix of the sorted rows found with one bisect. Per-ingredient
+# stock at T is a bincount over that suffix, cheap enough to answer every
+# campaign duration option on each rerun.
+class InventoryIndex:
+    def __init__(self, inventory_df):
+        df = normalize_inventory(inventory_df)
+        df = df[df['Ingredient'].notna() & df['Expiry Date'].notna() & (df['standardized_quantity'] > 0)]
+        self.frame = df.sort_values('Expiry Date', kind='stable').reset_index(drop=True)
+        self.expiry = self.frame['Expiry Date'].to_numpy(dtype='datetime64[ns]')
+        self.codes, self.ingredients = pd.factorize(self.frame['Ingredient'].str.lower())
+        self.quantities = self.frame['standardized_quantity'].to_numpy(dtype=float)
+
+    # Position of the first lot still usable at `when`
+    def _start(self, when):
+        when = pd.Timestamp(when or datetime.now()).to_datetime64().astype('datetime64[ns]')
+        return int(np.searchsorted(self.expiry, when, side='right'))
+
+    # Same rows as valid_inventory(), in expiry order
+    def valid_rows(self, as_of=None):
+        return self.frame.iloc[self._start(as_of):]
+
+    # Usable stock per lowercased ingredient at `when` (like stock_levels())
+    def stock_at(self, when=None):
+        start = self._start(when)
+        totals = np.bincount(self.codes[start:], weights=self.quantities[start:], minlength=len(self.ingredients))
+        stock = pd.Series(totals, index=self.ingredients)
+        return stock[stock > 0]
+
+    def available_at(self, when=None):
+        return self.stock_at(when).index.tolist()
+
+    # Stock that lasts a whole campaign: lots expiring before its last day don't count
+    def stock_through(self, campaign_duration, today=None):
+        return self.stock_at(campaign_end(campaign_duration, today))
+
+    # Forward stock for several duration options at once
+    def availability(self, durations, today=None):
+        today = today or datetime.now()
+        return {duration: self.stock_through(duration, today) for duration in durations}
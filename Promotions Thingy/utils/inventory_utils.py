@@ -2,38 +2,58 @@ import pandas as pd
 from datetime import datetime
 import re
 
+from utils.dish_index import DishIndex
+
+# Multiplier to grams/ml or pieces for every unit we accept
+UNIT_FACTORS = {
+    'kg': 1000.0,
+    'g': 1.0,
+    'l': 1000.0,
+    'ml': 1.0,
+    'pcs': 1.0,
+    'piece': 1.0,
+    'pieces': 1.0,
+}
+
+QUANTITY_PATTERN = r"([\d\.]+)\s*(\w+)"
+
 # Parse quantity like "2 kg" or "500 ml"
 def parse_quantity(qty_string):
-    match = re.match(r"([\d\.]+)\s*(\w+)", str(qty_string).lower())
+    match = re.match(QUANTITY_PATTERN, str(qty_string).lower())
     return (float(match.group(1)), match.group(2)) if match else (None, None)
 
 # Standardize to grams/ml or pieces
 def standardize_quantity(quantity, unit):
-    if unit == 'kg': return quantity * 1000
-    if unit == 'g': return quantity
-    if unit == 'l': return quantity * 1000
-    if unit == 'ml': return quantity
-    if unit in ['pcs', 'piece', 'pieces']: return quantity
-    return None
+    factor = UNIT_FACTORS.get(unit)
+    return quantity * factor if factor is not None else None
 
-# Process and filter inventory data
-def filter_valid_ingredients(inventory_df):
-    today = datetime.now()
-    inventory_df['Expiry Date'] = pd.to_datetime(inventory_df['Expiry Date'], dayfirst=True)
+# Vectorized parse + standardize of a whole inventory frame (returns a copy)
+def normalize_inventory(inventory_df):
+    df = inventory_df.copy()
+    df['Expiry Date'] = pd.to_datetime(df['Expiry Date'], dayfirst=True, errors='coerce')
 
-    parsed = inventory_df['Quantity'].apply(parse_quantity)
-    inventory_df['value'] = parsed.apply(lambda x: x[0])
-    inventory_df['unit'] = parsed.apply(lambda x: x[1])
-    inventory_df['standardized_quantity'] = inventory_df.apply(lambda row: standardize_quantity(row['value'], row['unit']), axis=1)
+    # Exports repeat the same few quantity strings, so parse each distinct one once
+    codes, uniques = pd.factorize(df['Quantity'].astype(str).str.lower(), use_na_sentinel=False)
+    parts = pd.Series(uniques).str.extract('^' + QUANTITY_PATTERN)
+    values = pd.to_numeric(parts[0], errors='coerce').to_numpy(dtype=float)
+    factors = parts[1].map(UNIT_FACTORS).to_numpy(dtype=float)
 
-    valid_df = inventory_df[(inventory_df['Expiry Date'] > today) & (inventory_df['standardized_quantity'] > 0)]
-    return valid_df['Ingredient'].str.lower().tolist()
+    df['value'] = values[codes]
+    df['unit'] = parts[1].to_numpy()[codes]
+    df['standardized_quantity'] = values[codes] * factors[codes]
+    return df
+
+# Rows that are unexpired and have a usable quantity
+def valid_inventory(inventory_df, as_of=None):
+    df = normalize_inventory(inventory_df)
+    today = as_of or datetime.now()
+    return df[(df['Expiry Date'] > today) & (df['standardized_quantity'] > 0)]
+
+# Process and filter inventory data
+def filter_valid_ingredients(inventory_df, as_of=None):
+    return valid_inventory(inventory_df, as_of)['Ingredient'].str.lower().tolist()
 
 # Find dishes that can be made from valid ingredients
-def find_possible_dishes(menu_df, available_ingredients):
-    possible = []
-    for _, row in menu_df.iterrows():
-        required = [i.strip().lower() for i in row['ingredients'].split(',')]
-        if all(i in available_ingredients for i in required):
-            possible.append(row['name'])
-    return possible
+def find_possible_dishes(menu_df, available_ingredients, index=None):
+    index = index or DishIndex(menu_df)
+    return index.possible_for(available_ingredients)
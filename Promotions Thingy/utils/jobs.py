@@ -0,0 +1,290 @@
+import os
+import re
+import socket
+import time
+import uuid
+
+from firebase_admin import firestore
+
+from utils.campaigns import iter_unscored
+from utils.firebase import BatchUpdater, run_transaction
+from utils.leaderboard import load_leaderboard, make_entry, record_scores
+from utils.near_duplicates import (SCORE_REUSE_THRESHOLD, NearDuplicateIndex, band_candidates, rank_matches,
+                                   signature_fields, stored_signature)
+from utils.rollups import write_rollup
+from utils.scoring import score_campaigns
+
+JOBS_COLLECTION = "scoring_jobs"
+
+# Campaigns claimed per lease round and how long a lease is held
+CLAIM_SIZE = int(os.environ.get("SCORING_CLAIM_SIZE", 50))
+LEASE_SECONDS = int(os.environ.get("SCORING_LEASE_SECONDS", 300))
+
+# Errors kept on the job doc for the Admin Panel (the latest ones; error_count
+# has the total)
+MAX_JOB_ERRORS = 20
+
+# Failed rounds in a row before a worker leaves a job for its next pass
+MAX_FAILED_ROUNDS = int(os.environ.get("SCORING_MAX_FAILED_ROUNDS", 3))
+
+ACTIVE_STATUSES = ("queued", "running")
+
+# Worker ids are used as field names, so keep them to [A-Za-z0-9_]
+def new_worker_id():
+    return re.sub(r"\W", "_", f"{socket.gethostname()}_{os.getpid()}_{uuid.uuid4().hex[:6]}")
+
+def _job_ref(db, job_id):
+    return db.collection(JOBS_COLLECTION).document(job_id)
+
+# Queue a scoring batch for a month; returns the job id
+def enqueue_scoring_job(db, month, total, skipped=0):
+    ref = db.collection(JOBS_COLLECTION).document()
+    ref.set({
+        "month": month,
+        "status": "queued",
+        "total": total,
+        "scored": 0,
+        "failed": 0,
+        "reused": 0,
+        "skipped": skipped,
+        "errors": [],
+        "error_count": 0,
+        "workers": {},
+        "created_at": firestore.SERVER_TIMESTAMP,
+        "updated_at": firestore.SERVER_TIMESTAMP,
+    })
+    return ref.id
+
+# Most recently created job for a month, as (job_id, data) or None
+def latest_job(db, month):
+    jobs = [(doc.id, doc.to_dict()) for doc in db.collection(JOBS_COLLECTION).where("month", "==", month).stream()]
+    jobs = [job for job in jobs if job[1].get("created_at") is not None]
+    return max(jobs, key=lambda job: job[1]["created_at"]) if jobs else None
+
+# Oldest queued or running job, as (job_id, data) or None
+def next_job(db):
+    jobs = [(doc.id, doc.to_dict()) for doc in
+            db.collection(JOBS_COLLECTION).where("status", "in", list(ACTIVE_STATUSES)).stream()]
+    jobs = [job for job in jobs if job[1].get("created_at") is not None]
+    return min(jobs, key=lambda job: job[1]["created_at"]) if jobs else None
+
+# Append errors to a job, keeping only the latest MAX_JOB_ERRORS so a long
+# failing job can't grow its doc without bound
+def record_job_errors(db, job_id, errors):
+    if not errors:
+        return
+    ref = _job_ref(db, job_id)
+
+    def update(transaction):
+        kept = ref.get(transaction=transaction).to_dict().get("errors") or []
+        transaction.update(ref, {"errors": (kept + list(errors))[-MAX_JOB_ERRORS:],
+                                 "error_count": firestore.Increment(len(errors))})
+
+    run_transaction(db, update)
+
+# Drop this worker's leases on some campaigns, leaving any another worker
+# has taken since
+def release_leases(db, worker_id, doc_ids):
+    refs = [db.collection("staff_campaigns").document(doc_id) for doc_id in doc_ids]
+
+    def release(transaction):
+        snapshots = [ref.get(transaction=transaction) for ref in refs]
+        for snapshot in snapshots:
+            lease = (snapshot.to_dict() or {}).get("score_lease") if snapshot.exists else None
+            if lease and lease.get("owner") == worker_id:
+                transaction.update(snapshot.reference, {"score_lease": firestore.DELETE_FIELD})
+
+    if refs:
+        run_transaction(db, release)
+
+def _lease_held_by_other(data, worker_id, now):
+    lease = data.get("score_lease") or {}
+    return lease.get("expires_at", 0) > now and lease.get("owner") != worker_id
+
+# Lease up to `limit` unscored campaigns for this worker.
+# Candidates are re-read inside a transaction, so two workers can't both
+# take the same campaign. Returns (claimed [(doc_id, data)], leased_elsewhere),
+# where leased_elsewhere also counts candidates another worker leased or
+# scored between the query and the transaction: the job isn't finished
+# until that worker says so.
+def claim_campaigns(db, month, worker_id, limit=CLAIM_SIZE, lease_seconds=LEASE_SECONDS, exclude=()):
+    now = time.time()
+    candidates, leased_elsewhere = [], 0
+    for doc in iter_unscored(db, month, fields=["score_lease"]):
+        if doc.id in exclude:
+            continue
+        if _lease_held_by_other(doc.to_dict(), worker_id, now):
+            leased_elsewhere += 1
+            continue
+        candidates.append(doc.reference)
+        if len(candidates) >= limit:
+            break
+    if not candidates:
+        return [], leased_elsewhere
+
+    def claim(transaction):
+        snapshots = [ref.get(transaction=transaction) for ref in candidates]
+        claimed, lost = [], 0
+        for snapshot in snapshots:
+            data = snapshot.to_dict() if snapshot.exists else None
+            if data is None:
+                continue
+            if "ai_score" in data or _lease_held_by_other(data, worker_id, now):
+                lost += 1
+                continue
+            transaction.update(snapshot.reference,
+                               {"score_lease": {"owner": worker_id, "expires_at": now + lease_seconds}})
+            claimed.append((snapshot.id, data))
+        return claimed, lost
+
+    claimed, lost = run_transaction(db, claim)
+    return claimed, leased_elsewhere + lost
+
+# Sort a claimed round before any model call.
+# A campaign that closely matches an already scored one (any month) reuses
+# its score; one that matches an earlier campaign of the same round waits
+# for that campaign's score. Looser matches are scored but flagged.
+# Returns (to_score [(doc_id, text)], reused {doc_id: fields},
+# followers {leader_id: [(doc_id, similarity)]}, extra {doc_id: fields}),
+# where extra holds fields to store with each result (signatures, flags).
+# Past campaigns for the whole round come from one batched band lookup.
+def dedupe_round(db, claimed):
+    round_index = NearDuplicateIndex()
+    to_score, reused, followers, extra, signatures = [], {}, {}, {}, {}
+    for doc_id, data in claimed:
+        fields = {} if "lsh_bands" in data else signature_fields(data.get("campaign"))
+        signatures[doc_id] = stored_signature(data) if "lsh_bands" in data else stored_signature(fields)
+        extra[doc_id] = fields
+    candidates = band_candidates(db, [signature for signature in signatures.values() if signature is not None])
+
+    for doc_id, data in claimed:
+        signature = signatures[doc_id]
+        if signature is None:
+            to_score.append((doc_id, data.get("campaign", "")))
+            continue
+
+        matches = rank_matches(signature, candidates, exclude={doc_id})
+        fields = extra[doc_id]
+        scored = [match for match in matches
+                  if match[1] >= SCORE_REUSE_THRESHOLD and match[2].get("ai_score") is not None]
+        if scored:
+            match_id, match_similarity, match = scored[0]
+            reused[doc_id] = dict(fields, ai_score=match["ai_score"], duplicate_of=match_id,
+                                  duplicate_similarity=match_similarity)
+            continue
+        leaders = round_index.query(signature, SCORE_REUSE_THRESHOLD)
+        if leaders:
+            followers.setdefault(leaders[0][0], []).append((doc_id, leaders[0][1]))
+            continue
+
+        if matches:
+            fields["near_duplicates"] = [match[0] for match in matches[:5]]
+        round_index.add(doc_id, signature)
+        to_score.append((doc_id, data.get("campaign", "")))
+    return to_score, reused, followers, extra
+
+# Score one claimed round, write its scores and record progress on the job
+def _score_round(db, model, job_id, month, worker_id, claimed, failed_ids, log):
+    doc_data = dict(claimed)
+    log(f"[{job_id}] {worker_id} claimed {len(claimed)} campaigns")
+
+    errors = []
+    writer = BatchUpdater(db, "staff_campaigns")
+    results = []
+    release = {"score_lease": firestore.DELETE_FIELD}
+    to_score, reused, followers, extra = dedupe_round(db, claimed)
+    for doc_id, fields in reused.items():
+        results += writer.update(doc_id, dict(fields, scored=True, **release))
+    for doc_id, score, error in score_campaigns(model, to_score):
+        if error is not None:
+            failed_ids.add(doc_id)
+            errors.append(f"{doc_data[doc_id].get('name', doc_id)}: {error}")
+            results += writer.update(doc_id, dict(extra[doc_id], **release))
+            # Waiting duplicates go back to the queue and are scored on their own
+            for follower_id, _ in followers.get(doc_id, []):
+                results += writer.update(follower_id, dict(extra[follower_id], **release))
+            continue
+        results += writer.update(doc_id, dict(extra[doc_id], ai_score=score, scored=True, **release))
+        for follower_id, follower_similarity in followers.get(doc_id, []):
+            results += writer.update(follower_id, dict(extra[follower_id], ai_score=score, scored=True,
+                                                       duplicate_of=doc_id,
+                                                       duplicate_similarity=follower_similarity, **release))
+    results += writer.flush()
+
+    entries = []
+    for doc_id, fields, error in results:
+        if "ai_score" not in fields:
+            continue
+        if error is None:
+            entries.append(make_entry(doc_id, doc_data[doc_id], fields["ai_score"]))
+        else:
+            failed_ids.add(doc_id)
+            errors.append(f"{doc_data[doc_id].get('name', doc_id)}: {error}")
+    record_scores(db, month, entries)
+    scored = len(entries)
+    reused_scores = sum(error is None and "duplicate_of" in fields for _, fields, error in results)
+
+    progress = {
+        "scored": firestore.Increment(scored),
+        "reused": firestore.Increment(reused_scores),
+        "failed": firestore.Increment(len(errors)),
+        f"workers.{worker_id}": time.time(),
+        "checkpoint": {"worker": worker_id, "last_doc_id": claimed[-1][0], "at": time.time()},
+        "updated_at": firestore.SERVER_TIMESTAMP,
+    }
+    _job_ref(db, job_id).update(progress)
+    record_job_errors(db, job_id, errors)
+    log(f"[{job_id}] {worker_id} scored {scored} ({reused_scores} reused from near-duplicates), "
+        f"failed {len(errors)}")
+
+# Drain a job's unscored campaigns, recording progress on the job doc after
+# every claimed round. Scores already written are the checkpoint: a worker
+# restarted mid-job only picks up campaigns that are still unscored.
+# A round that raises (Firestore or model trouble) is recorded on the job,
+# its leases are released and the worker moves on; its campaigns are
+# retried on the next pass, and the job isn't completed before then.
+# Returns whether anything was scored or the job completed; False means
+# other workers hold every remaining lease, or rounds keep failing, so
+# callers should wait before picking the job up again.
+def run_job(db, model, job_id, worker_id=None, log=print):
+    worker_id = worker_id or new_worker_id()
+    job_ref = _job_ref(db, job_id)
+    month = job_ref.get().to_dict()["month"]
+    job_ref.update({"status": "running", f"workers.{worker_id}": time.time(),
+                    "updated_at": firestore.SERVER_TIMESTAMP})
+
+    failed_ids, interrupted_ids = set(), set()
+    progressed, failed_rounds = False, 0
+    while True:
+        claimed = []
+        try:
+            claimed, leased_elsewhere = claim_campaigns(db, month, worker_id, exclude=failed_ids | interrupted_ids)
+            if not claimed:
+                break
+            _score_round(db, model, job_id, month, worker_id, claimed, failed_ids, log)
+            progressed, failed_rounds = True, 0
+        except Exception as error:
+            failed_rounds += 1
+            interrupted_ids.update(doc_id for doc_id, _ in claimed)
+            log(f"[{job_id}] {worker_id} round of {len(claimed)} campaigns failed: {error!r}")
+            try:
+                record_job_errors(db, job_id, [f"a round of {len(claimed)} campaigns ({worker_id}): {error}"])
+                release_leases(db, worker_id, [doc_id for doc_id, _ in claimed])
+            except Exception as cleanup_error:
+                # Leases run out on their own after LEASE_SECONDS
+                log(f"[{job_id}] {worker_id} could not release the round: {cleanup_error!r}")
+            if failed_rounds >= MAX_FAILED_ROUNDS:
+                return progressed
+
+    # Other workers still hold leases: they will finish the job. Campaigns
+    # of interrupted rounds are left for the next pass.
+    if leased_elsewhere or interrupted_ids:
+        return progressed
+    # Repair any aggregate drift (e.g. a worker that died between writing its
+    # scores and recording them) before the month is summarised
+    load_leaderboard(db, month, settle_seconds=0)
+    write_rollup(db, month)
+    job_ref.update({"status": "completed", "completed_at": firestore.SERVER_TIMESTAMP,
+                    "updated_at": firestore.SERVER_TIMESTAMP})
+    log(f"[{job_id}] completed")
+    return True
@@ -0,0 +1,157 @@
+import time
+
+from firebase_admin import firestore
+
+from utils.firebase import run_transaction
+from utils.telemetry import span
+
+AGGREGATE_COLLECTION = "leaderboard_aggregates"
+ENTRY_FIELDS = ("name", "promotion_type", "goal")
+
+# Bumped when the aggregate's layout changes; older docs are rebuilt on read
+AGGREGATE_VERSION = 2
+
+# Best entries kept on the aggregate (enough for a bar per staff member in
+# the score chart); the full ranking is paged from staff_campaigns
+AGGREGATE_TOP_ENTRIES = 100
+
+# Seconds the aggregate's count may disagree with the scored campaigns before
+# a reader rebuilds it. A scoring round records its scores right after
+# writing them, so a longer gap means a worker died in between.
+AGGREGATE_SETTLE_SECONDS = 120
+
+# Score histogram kept on the aggregate: equal-width bins over 0-10
+SCORE_HISTOGRAM_BINS = 20
+
+# Rows per leaderboard page and the only fields a page transfers
+LEADERBOARD_PAGE_SIZE = 25
+LEADERBOARD_FIELDS = list(ENTRY_FIELDS) + ["ai_score"]
+
+# Leaderboard row for a scored staff_campaigns doc
+def make_entry(doc_id, data, score):
+    entry = {field: data.get(field, "") for field in ENTRY_FIELDS}
+    entry.update({"doc_id": doc_id, "ai_score": score})
+    return entry
+
+def _score_bin(score):
+    return min(max(int(score * SCORE_HISTOGRAM_BINS / 10), 0), SCORE_HISTOGRAM_BINS - 1)
+
+# Campaigns per score bin
+def score_histogram(scores):
+    histogram = [0] * SCORE_HISTOGRAM_BINS
+    for score in scores:
+        histogram[_score_bin(score)] += 1
+    return histogram
+
+# Fold newly scored entries into an aggregate. count, sum, max and the
+# histogram cover every scored campaign; entries keeps only the best
+# AGGREGATE_TOP_ENTRIES, so the doc stays the same size however many
+# staff take part. An entry already in the top list replaces its old score.
+def merge_entries(month, aggregate, entries):
+    aggregate = aggregate or {}
+    top = {entry["doc_id"]: entry for entry in aggregate.get("entries", [])}
+    count, total = aggregate.get("count", 0), aggregate.get("sum", 0)
+    histogram = list(aggregate.get("histogram") or score_histogram([]))
+    for entry in entries:
+        previous = top.get(entry["doc_id"])
+        if previous is not None:
+            count, total = count - 1, total - previous["ai_score"]
+            histogram[_score_bin(previous["ai_score"])] -= 1
+        count, total = count + 1, total + entry["ai_score"]
+        histogram[_score_bin(entry["ai_score"])] += 1
+        top[entry["doc_id"]] = entry
+
+    ranked = sorted(top.values(), key=lambda entry: entry["ai_score"], reverse=True)
+    return {
+        "month": month,
+        "version": AGGREGATE_VERSION,
+        "entries": ranked[:AGGREGATE_TOP_ENTRIES],
+        "count": count,
+        "sum": total,
+        "max": ranked[0]["ai_score"] if ranked else 0,
+        "histogram": histogram,
+    }
+
+def _aggregate_ref(db, month):
+    return db.collection(AGGREGATE_COLLECTION).document(month)
+
+# A month's scored campaigns, best first. Needs the composite index
+# staff_campaigns (month ASC, ai_score DESC) from firestore.indexes.json.
+def _ranked_query(db, month):
+    return (db.collection("staff_campaigns")
+            .where("month", "==", month)
+            .order_by("ai_score", direction=firestore.Query.DESCENDING))
+
+# Leaderboard entries of every scored campaign of a month, best first,
+# from one projected query
+def scored_entries(db, month):
+    with span("firestore.scored_entries") as fields:
+        entries = [make_entry(doc.id, doc.to_dict(), doc.get("ai_score"))
+                   for doc in _ranked_query(db, month).select(LEADERBOARD_FIELDS).stream()]
+        fields["docs"] = len(entries)
+    return entries
+
+# Transactionally fold scored entries into the month's aggregate doc. A
+# month without one (or with an older layout) is rebuilt from its
+# staff_campaigns docs instead, which already hold these scores.
+def record_scores(db, month, entries):
+    if not entries:
+        return
+    ref = _aggregate_ref(db, month)
+
+    def update(transaction):
+        snapshot = ref.get(transaction=transaction)
+        if not snapshot.exists or snapshot.get("version") != AGGREGATE_VERSION:
+            return False
+        merged = merge_entries(month, snapshot.to_dict(), entries)
+        merged["updated_at"] = firestore.SERVER_TIMESTAMP
+        transaction.set(ref, merged)
+        return True
+
+    if not run_transaction(db, update):
+        rebuild_leaderboard(db, month)
+
+# Rewrite a month's aggregate from its staff_campaigns docs
+def rebuild_leaderboard(db, month):
+    aggregate = merge_entries(month, {}, scored_entries(db, month))
+    _aggregate_ref(db, month).set(dict(aggregate, updated_at=firestore.SERVER_TIMESTAMP))
+    return aggregate
+
+# Scored campaigns of a month, from one count() over the ranking query
+def count_ranked(db, month):
+    return _ranked_query(db, month).count(alias="count").get()[0][0].value
+
+def _age(aggregate):
+    updated_at = aggregate.get("updated_at")
+    return time.time() - updated_at.timestamp() if updated_at is not None else float("inf")
+
+# One page of scored campaigns, best first, without the campaign text.
+# Pass the returned cursor back as start_after for the next page; it is
+# None once the last page has been read.
+def fetch_leaderboard_page(db, month, page_size=LEADERBOARD_PAGE_SIZE, start_after=None):
+    query = _ranked_query(db, month).select(LEADERBOARD_FIELDS).limit(page_size)
+    if start_after is not None:
+        query = query.start_after(start_after)
+    with span("firestore.leaderboard_page"):
+        docs = list(query.stream())
+    rows = [make_entry(doc.id, doc.to_dict(), doc.get("ai_score")) for doc in docs]
+    return rows, docs[-1] if len(docs) == page_size else None
+
+# Campaign text of a single staff_campaigns doc
+def fetch_campaign_text(db, doc_id):
+    snapshot = db.collection("staff_campaigns").document(doc_id).get(field_paths=["campaign"])
+    return snapshot.to_dict().get("campaign", "") if snapshot.exists else ""
+
+# Totals, histogram and top entries for a month: the aggregate doc plus a
+# count() to check it. The aggregate is rebuilt when it is missing, has an
+# older layout, or its count has disagreed with the scored campaigns for
+# settle_seconds since its last update (pass 0 once scoring has finished).
+def load_leaderboard(db, month, settle_seconds=AGGREGATE_SETTLE_SECONDS):
+    snapshot = _aggregate_ref(db, month).get()
+    aggregate = snapshot.to_dict() if snapshot.exists else None
+    if aggregate is None or aggregate.get("version") != AGGREGATE_VERSION:
+        return rebuild_leaderboard(db, month)
+    if aggregate["count"] != count_ranked(db, month) and _age(aggregate) >= settle_seconds:
+        with span("firestore.leaderboard_repair"):
+            return rebuild_leaderboard(db, month)
+    return aggregate
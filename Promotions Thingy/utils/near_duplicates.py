@@ -0,0 +1,177 @@
+import hashlib
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from utils.campaigns import CAMPAIGNS_COLLECTION
+from utils.telemetry import span
+
+# MinHash signature length, split into LSH bands of LSH_ROWS values.
+# 16 bands of 8 rows make campaigns above ~0.7 Jaccard similarity very
+# likely to share at least one band.
+NUM_PERM = 128
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERM // LSH_BANDS
+SHINGLE_WORDS = 3
+
+# Estimated Jaccard similarity from which a campaign counts as a
+# near-duplicate, and from which a scored one's score is reused
+NEAR_DUPLICATE_THRESHOLD = 0.8
+SCORE_REUSE_THRESHOLD = 0.9
+
+# Campaigns listed by a "similar past campaigns" lookup
+SIMILAR_LIMIT = 10
+
+# array_contains_any takes at most 30 values; batched band lookups are
+# split into queries of that size, run this many at once
+MAX_ANY_VALUES = 30
+SIMILAR_QUERY_WORKERS = 8
+
+SIMILAR_FIELDS = ("name", "month", "ai_score", "promotion_type")
+
+# Signatures are stored on the campaign docs, so the permutations are
+# seeded and must never change
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_permutations = np.random.default_rng(20240601)
+_A = _permutations.integers(1, 1 << 31, NUM_PERM, dtype=np.uint64)
+_B = _permutations.integers(0, 1 << 31, NUM_PERM, dtype=np.uint64)
+
+# Word n-grams of the normalized text
+def shingles(text):
+    words = re.findall(r"\w+", str(text or "").lower())
+    if len(words) < SHINGLE_WORDS:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+def _hash32(token):
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=4).digest(), "little")
+
+# MinHash signature of a text, or None if it has no words
+def minhash(text):
+    tokens = shingles(text)
+    if not tokens:
+        return None
+    hashes = np.fromiter((_hash32(token) for token in tokens), dtype=np.uint64, count=len(tokens))
+    return ((np.outer(hashes, _A) + _B) % _PRIME & _MAX_HASH).min(axis=0)
+
+# Estimated Jaccard similarity of two signatures
+def similarity(a, b):
+    if a is None or b is None or len(a) != len(b):
+        return 0.0
+    return float(np.mean(np.asarray(a) == np.asarray(b)))
+
+# One key per band; campaigns sharing any key are near-duplicate candidates
+def band_keys(signature):
+    if signature is None:
+        return []
+    return [f"{band}:{hashlib.blake2b(signature[band * LSH_ROWS:(band + 1) * LSH_ROWS].tobytes(), digest_size=8).hexdigest()}"
+            for band in range(LSH_BANDS)]
+
+# Fields stored on a staff_campaigns doc. lsh_bands is an array field, so
+# Firestore's automatic array index serves as the persistent LSH table;
+# minhash is only ever read back, and firestore.indexes.json exempts it
+# from indexing.
+def signature_fields(text):
+    signature = minhash(text)
+    if signature is None:
+        return {}
+    return {"minhash": [int(value) for value in signature], "lsh_bands": band_keys(signature)}
+
+def stored_signature(data):
+    values = (data or {}).get("minhash")
+    return np.asarray(values, dtype=np.uint64) if values else None
+
+# Signature of a stored campaign, computed from its text if it predates signatures
+def campaign_signature(db, doc_id):
+    snapshot = db.collection(CAMPAIGNS_COLLECTION).document(doc_id).get(field_paths=["minhash"])
+    signature = stored_signature(snapshot.to_dict()) if snapshot.exists else None
+    if signature is None and snapshot.exists:
+        text = db.collection(CAMPAIGNS_COLLECTION).document(doc_id).get(field_paths=["campaign"]).to_dict()
+        signature = minhash(text.get("campaign"))
+    return signature
+
+# Stored campaigns (any month) sharing a band with any of the signatures,
+# as {doc_id: data} including minhash. The band keys of all signatures are
+# deduplicated and looked up MAX_ANY_VALUES at a time, concurrently, so a
+# whole scoring round costs one parallel round of queries. Each signature's
+# keys stay together, so a close match mostly comes back from one query.
+def band_candidates(db, signatures, fields=SIMILAR_FIELDS):
+    keys = list(dict.fromkeys(key for signature in signatures for key in band_keys(signature)))
+    if not keys:
+        return {}
+    chunks = [keys[i:i + MAX_ANY_VALUES] for i in range(0, len(keys), MAX_ANY_VALUES)]
+
+    def fetch(chunk):
+        query = (db.collection(CAMPAIGNS_COLLECTION)
+                 .where("lsh_bands", "array_contains_any", chunk)
+                 .select(["minhash", *fields]))
+        return [(doc.id, doc.to_dict()) for doc in query.stream()]
+
+    with span("firestore.similar_campaigns", items=len(chunks)) as span_fields, \
+            ThreadPoolExecutor(max_workers=min(SIMILAR_QUERY_WORKERS, len(chunks))) as pool:
+        candidates = {doc_id: data for rows in pool.map(fetch, chunks) for doc_id, data in rows}
+        span_fields["docs"] = len(candidates)
+    return candidates
+
+# Candidates at least `threshold` similar to a signature, as (doc_id,
+# similarity, data without minhash) sorted by similarity
+def rank_matches(signature, candidates, threshold=NEAR_DUPLICATE_THRESHOLD, exclude=()):
+    matches = []
+    for doc_id, data in candidates.items():
+        if doc_id in exclude:
+            continue
+        score = similarity(signature, stored_signature(data))
+        if score >= threshold:
+            matches.append((doc_id, score, {key: value for key, value in data.items() if key != "minhash"}))
+    return sorted(matches, key=lambda match: match[1], reverse=True)
+
+# Past campaigns (any month) similar to a signature, as (doc_id, similarity,
+# data) sorted by similarity
+def similar_campaigns(db, signature, threshold=NEAR_DUPLICATE_THRESHOLD, exclude=(), fields=SIMILAR_FIELDS):
+    if signature is None:
+        return []
+    return rank_matches(signature, band_candidates(db, [signature], fields), threshold, exclude)
+
+# In-memory LSH over (key, signature) pairs, e.g. the campaigns of one
+# scoring round
+class NearDuplicateIndex:
+    def __init__(self):
+        self.signatures = {}
+        self.buckets = {}
+
+    def add(self, key, signature):
+        self.signatures[key] = signature
+        for band in band_keys(signature):
+            self.buckets.setdefault(band, set()).add(key)
+
+    def query(self, signature, threshold=NEAR_DUPLICATE_THRESHOLD):
+        candidates = set()
+        for band in band_keys(signature):
+            candidates |= self.buckets.get(band, set())
+        matches = [(key, similarity(signature, self.signatures[key])) for key in candidates]
+        return sorted([match for match in matches if match[1] >= threshold], key=lambda match: match[1], reverse=True)
+
+# Store signatures on campaigns written before they existed; month=None
+# covers every month
+def index_campaigns(db, month=None):
+    query = db.collection(CAMPAIGNS_COLLECTION)
+    if month is not None:
+        query = query.where("month", "==", month)
+    batch, pending, updated = db.batch(), 0, 0
+    for doc in query.select(["campaign", "lsh_bands"]).stream():
+        data = doc.to_dict()
+        if "lsh_bands" in data:
+            continue
+        fields = signature_fields(data.get("campaign"))
+        if not fields:
+            continue
+        batch.update(doc.reference, fields)
+        pending += 1
+        if pending == 400:
+            batch.commit()
+            batch, updated, pending = db.batch(), updated + pending, 0
+    if pending:
+        batch.commit()
+    return updated + pending
@@ -0,0 +1,84 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.campaigns import count_campaigns
+from utils.leaderboard import AGGREGATE_TOP_ENTRIES, load_leaderboard
+from utils.telemetry import span
+
+# Outlet ids, comma-separated. With none set the app keeps the single
+# flat namespace (staff_campaigns, menu, ... at the root).
+OUTLETS = [outlet.strip() for outlet in os.environ.get("OUTLETS", "").split(",") if outlet.strip()]
+OUTLETS_COLLECTION = "outlets"
+
+# Outlets read at once by a chain-wide query
+FANOUT_MAX_WORKERS = int(os.environ.get("FANOUT_MAX_WORKERS", 16))
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+# Firestore client whose collections live under outlets/{outlet}/, so
+# every helper taking a `db` works per outlet unchanged. Anything else
+# (batch, transaction) goes to the wrapped client.
+class OutletClient:
+    def __init__(self, db, outlet):
+        self.db = db
+        self.outlet = outlet
+
+    def collection(self, name):
+        return self.db.collection(OUTLETS_COLLECTION).document(self.outlet).collection(name)
+
+    def __getattr__(self, name):
+        return getattr(self.db, name)
+
+# Shared client for an outlet; no outlet means the flat collections
+def get_outlet_db(db, outlet):
+    if not outlet:
+        return db
+    with _clients_lock:
+        client = _clients.get(outlet)
+        if client is None or client.db is not db:
+            client = _clients[outlet] = OutletClient(db, outlet)
+    return client
+
+# fn(outlet_db, *args) for every outlet concurrently, as {outlet: result}.
+# Wall time is the slowest outlet, not the sum over outlets.
+def fan_out(db, outlets, fn, *args):
+    outlets = list(outlets)
+    if not outlets:
+        return {}
+    with span("firestore.fan_out", items=len(outlets)), \
+            ThreadPoolExecutor(max_workers=min(FANOUT_MAX_WORKERS, len(outlets))) as pool:
+        futures = {outlet: pool.submit(fn, get_outlet_db(db, outlet), *args) for outlet in outlets}
+        return {outlet: future.result() for outlet, future in futures.items()}
+
+# One outlet's month: its leaderboard aggregate and (submitted, scored) counts
+def _outlet_month(db, month):
+    return load_leaderboard(db, month), count_campaigns(db, month)
+
+# Chain-wide month in one parallel round of reads. The outlets' top entries
+# are merged into one ranking with an "outlet" field (the chain's best
+# AGGREGATE_TOP_ENTRIES are always among them); count, sum and max are
+# summed from the outlets' totals and "outlets" holds per-outlet stats.
+def chain_summary(db, month, outlets=None):
+    results = fan_out(db, outlets or OUTLETS, _outlet_month, month)
+    entries, stats, totals = [], {}, []
+    for outlet, (aggregate, (submitted, scored)) in results.items():
+        entries += [dict(entry, outlet=outlet) for entry in aggregate.get("entries", [])]
+        stats[outlet] = {
+            "submitted": submitted,
+            "scored": scored,
+            "avg_score": aggregate["sum"] / aggregate["count"] if aggregate.get("count") else None,
+            "max_score": aggregate.get("max") if aggregate.get("count") else None,
+        }
+        totals.append(aggregate)
+    entries.sort(key=lambda entry: entry["ai_score"], reverse=True)
+    return {
+        "month": month,
+        "entries": entries[:AGGREGATE_TOP_ENTRIES],
+        "count": sum(aggregate["count"] for aggregate in totals),
+        "sum": sum(aggregate["sum"] for aggregate in totals),
+        "max": max((aggregate["max"] for aggregate in totals if aggregate["count"]), default=0),
+        "submitted": sum(outlet["submitted"] for outlet in stats.values()),
+        "outlets": stats,
+    }
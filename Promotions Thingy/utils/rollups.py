@@ -0,0 +1,62 @@
+from firebase_admin import firestore
+
+from utils.campaigns import count_campaigns
+from utils.leaderboard import scored_entries
+from utils.telemetry import span
+
+ROLLUP_COLLECTION = "monthly_rollups"
+
+# Score histogram buckets: [0, 1), [1, 2), ... [9, 10]
+HISTOGRAM_BINS = 10
+
+# Months shown by the Trends view unless asked for more
+TREND_MONTHS = 12
+
+def _bucket(score):
+    return min(max(int(score), 0), HISTOGRAM_BINS - 1)
+
+# Count and average score per value of an entry field
+def _averages(entries, field):
+    groups = {}
+    for entry in entries:
+        group = groups.setdefault(entry.get(field) or "Unknown", {"count": 0, "sum": 0.0})
+        group["count"] += 1
+        group["sum"] += entry["ai_score"]
+    return {key: {"count": group["count"], "avg": group["sum"] / group["count"]} for key, group in groups.items()}
+
+# Month summary built from the leaderboard entries of every scored campaign
+def build_rollup(month, entries, submitted):
+    histogram = [0] * HISTOGRAM_BINS
+    for entry in entries:
+        histogram[_bucket(entry["ai_score"])] += 1
+    scores = [entry["ai_score"] for entry in entries]
+    return {
+        "month": month,
+        "submitted": submitted,
+        "scored": len(entries),
+        "avg_score": sum(scores) / len(scores) if scores else None,
+        "max_score": max(scores, default=None),
+        "min_score": min(scores, default=None),
+        "histogram": histogram,
+        "staff_scores": [{"name": entry.get("name", ""), "score": entry["ai_score"]} for entry in entries],
+        "by_promotion_type": _averages(entries, "promotion_type"),
+        "by_goal": _averages(entries, "goal"),
+    }
+
+# Recompute a month's rollup: two count() queries plus one projected query
+# over the scored campaigns (the aggregate only keeps the top entries)
+def write_rollup(db, month):
+    with span("firestore.write_rollup"):
+        submitted, _ = count_campaigns(db, month)
+        rollup = build_rollup(month, scored_entries(db, month), submitted)
+        db.collection(ROLLUP_COLLECTION).document(month).set(dict(rollup, updated_at=firestore.SERVER_TIMESTAMP))
+    return rollup
+
+# The latest `months` rollups, oldest first: one read per month
+def load_rollups(db, months=TREND_MONTHS):
+    query = (db.collection(ROLLUP_COLLECTION)
+             .order_by("month", direction=firestore.Query.DESCENDING)
+             .limit(months))
+    with span("firestore.load_rollups"):
+        rollups = [doc.to_dict() for doc in query.stream()]
+    return rollups[::-1]
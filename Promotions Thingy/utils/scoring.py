@@ -0,0 +1,191 @@
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from utils.gemini import (JSON_GENERATION_CONFIG, build_batch_scoring_prompt, build_scoring_prompt, cache_key,
+                          estimate_tokens, parse_batch_scores, parse_score, usage_fields)
+from utils.llm_cache import get_cache
+from utils.telemetry import span
+
+# Concurrency and request rate sized to our Gemini quota
+GEMINI_MAX_CONCURRENCY = int(os.environ.get("GEMINI_MAX_CONCURRENCY", 8))
+GEMINI_REQUESTS_PER_MINUTE = float(os.environ.get("GEMINI_REQUESTS_PER_MINUTE", 60))
+
+MAX_RETRIES = 5
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 30.0
+
+# HTTP status codes worth retrying (rate limited / server side)
+RETRYABLE_CODES = {429, 500, 502, 503, 504}
+
+# Prompt tokens per batched scoring request (0 disables batching) and
+# the most campaigns packed into one request
+SCORING_BATCH_TOKEN_BUDGET = int(os.environ.get("SCORING_BATCH_TOKEN_BUDGET", 6000))
+SCORING_BATCH_MAX_ITEMS = int(os.environ.get("SCORING_BATCH_MAX_ITEMS", 20))
+BATCH_PROMPT_OVERHEAD_TOKENS = 150
+
+# Token bucket shared by all scoring threads.
+# On a 429 the refill rate is halved; each success then recovers it
+# gradually towards the configured rate.
+class TokenBucket:
+    def __init__(self, requests_per_minute=GEMINI_REQUESTS_PER_MINUTE, capacity=None):
+        self.max_rate = requests_per_minute / 60.0
+        self.rate = self.max_rate
+        self.capacity = capacity or max(1.0, min(GEMINI_MAX_CONCURRENCY, requests_per_minute / 60.0))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def throttle(self):
+        with self._lock:
+            self._refill()
+            self.rate = max(self.max_rate / 16, self.rate / 2)
+
+    def recover(self):
+        with self._lock:
+            self._refill()
+            self.rate = min(self.max_rate, self.rate * 1.1)
+
+# Status code of an API error, if it carries one (google.api_core and fakes)
+def error_code(exc):
+    code = getattr(exc, "code", None)
+    code = getattr(code, "value", code)
+    return code if isinstance(code, int) else None
+
+def is_retryable(exc):
+    return error_code(exc) in RETRYABLE_CODES
+
+# Call fn under the limiter, backing off exponentially (with jitter) on 429/5xx
+def call_with_backoff(fn, limiter, max_retries=MAX_RETRIES):
+    for attempt in range(max_retries + 1):
+        limiter.acquire()
+        try:
+            result = fn()
+        except Exception as exc:
+            if not is_retryable(exc) or attempt == max_retries:
+                raise
+            if error_code(exc) == 429:
+                limiter.throttle()
+            delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt)
+            time.sleep(random.uniform(delay / 2, delay))
+        else:
+            limiter.recover()
+            return result
+
+# Pack jobs into batches whose prompts fit the token budget
+def plan_batches(jobs, token_budget=SCORING_BATCH_TOKEN_BUDGET, max_items=SCORING_BATCH_MAX_ITEMS):
+    batches, batch, used = [], [], BATCH_PROMPT_OVERHEAD_TOKENS
+    for key, text in jobs:
+        cost = estimate_tokens(text) + 10
+        if batch and (used + cost > token_budget or len(batch) >= max_items):
+            batches.append(batch)
+            batch, used = [], BATCH_PROMPT_OVERHEAD_TOKENS
+        batch.append((key, text))
+        used += cost
+    if batch:
+        batches.append(batch)
+    return batches
+
+# Cache key of the single-campaign scoring request for a campaign
+def scoring_cache_key(model, campaign_text):
+    return cache_key(model, build_scoring_prompt(campaign_text), JSON_GENERATION_CONFIG)
+
+# Cached score for a campaign, or None
+def cached_score(model, campaign_text, cache):
+    text = cache.get(scoring_cache_key(model, campaign_text))
+    return parse_score(text) if text is not None else None
+
+# Only validated scores are cached, stored as a single-request response
+def cache_score(model, campaign_text, score, cache):
+    cache.put(scoring_cache_key(model, campaign_text), json.dumps({"score": score}))
+
+def score_campaign(model, campaign_text, limiter, cache=None):
+    prompt = build_scoring_prompt(campaign_text)
+    with span("gemini.score", items=1) as fields:
+        response = call_with_backoff(
+            lambda: model.generate_content(prompt, generation_config=JSON_GENERATION_CONFIG), limiter)
+        fields.update(usage_fields(response))
+    score = parse_score(response.text.strip())
+    if cache is not None:
+        cache_score(model, campaign_text, score, cache)
+    return score
+
+# Scores by key for one batch; items the response didn't score validly are omitted
+def score_batch(model, batch, limiter, cache=None):
+    prompt = build_batch_scoring_prompt(batch)
+    with span("gemini.score", items=len(batch)) as fields:
+        response = call_with_backoff(
+            lambda: model.generate_content(prompt, generation_config=JSON_GENERATION_CONFIG), limiter)
+        fields.update(usage_fields(response))
+    scores = parse_batch_scores(response.text.strip(), [key for key, _ in batch])
+    if cache is not None:
+        for key, text in batch:
+            if key in scores:
+                cache_score(model, text, scores[key], cache)
+    return scores
+
+# Score (key, campaign_text) jobs with bounded concurrency.
+# Campaigns already in the response cache are answered without a call.
+# The rest are packed into batched requests when a token budget is set;
+# any item a batch fails to score is retried on its own. Yields
+# (key, score, error) in completion order on the caller's thread, so
+# Streamlit progress widgets can be updated from the loop body.
+def score_campaigns(model, jobs, max_workers=GEMINI_MAX_CONCURRENCY, limiter=None,
+                    batch_token_budget=SCORING_BATCH_TOKEN_BUDGET, use_cache=True):
+    limiter = limiter or TokenBucket()
+    cache = get_cache() if use_cache else None
+
+    uncached = []
+    for key, text in jobs:
+        score = cached_score(model, text, cache) if cache is not None else None
+        if score is None:
+            uncached.append((key, text))
+        else:
+            yield key, score, None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = {}
+        if batch_token_budget:
+            for batch in plan_batches(uncached, batch_token_budget):
+                pending[pool.submit(score_batch, model, batch, limiter, cache)] = batch
+        else:
+            for key, text in uncached:
+                pending[pool.submit(score_campaign, model, text, limiter, cache)] = key
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                work = pending.pop(future)
+                if isinstance(work, list):
+                    try:
+                        scores = future.result()
+                    except Exception:
+                        scores = {}
+                    for key, text in work:
+                        if key in scores:
+                            yield key, scores[key], None
+                        else:
+                            pending[pool.submit(score_campaign, model, text, limiter, cache)] = key
+                    continue
+                try:
+                    yield work, future.result(), None
+                except Exception as exc:
+                    yield work, None, exc
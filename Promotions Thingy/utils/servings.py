@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+
+from utils.dish_index import split_ingredients
+from utils.inventory_utils import UNIT_FACTORS, parse_quantity
+
+# Days each campaign duration option has to be stocked for
+DURATION_DAYS = {
+    "Today Only": 1,
+    "Weekend Special": 2,
+    "Limited Time (3 days)": 3,
+    "Extended (1 week)": 7,
+}
+
+# Servings a dish must support per campaign day to be offered
+MIN_DAILY_SERVINGS = 1
+
+# "This Week" runs until Sunday, everything else has a fixed length
+def duration_days(campaign_duration, today=None):
+    if campaign_duration == "This Week":
+        return 7 - (today or datetime.now()).weekday()
+    return DURATION_DAYS.get(campaign_duration, 1)
+
+# Last day a campaign runs; stock has to still be usable then
+def campaign_end(campaign_duration, today=None):
+    today = today or datetime.now()
+    return today + timedelta(days=duration_days(campaign_duration, today) - 1)
+
+def required_servings(campaign_duration, today=None, daily_servings=MIN_DAILY_SERVINGS):
+    return duration_days(campaign_duration, today) * daily_servings
+
+# Recipe amount to g/ml/pcs; bare numbers are already in base units
+def standardize_amount(amount):
+    if isinstance(amount, (int, float)):
+        return float(amount)
+    value, unit = parse_quantity(amount)
+    factor = UNIT_FACTORS.get(unit)
+    return value * factor if value is not None and factor is not None else 0.0
+
+# Total usable stock per lowercased ingredient from valid_inventory() rows
+def stock_levels(valid_df):
+    return valid_df.groupby(valid_df['Ingredient'].str.lower())['standardized_quantity'].sum()
+
+# Dishes x ingredients matrix of required amounts per serving, stored
+# row-compressed (CSR) so memory grows with recipe lines, not D * I.
+# Dishes without an "ingredient_quantities" map only need the ingredient
+# present, which keeps name-only menus working unchanged.
+class RecipeMatrix:
+    def __init__(self, menu_df):
+        self.dish_names = menu_df['name'].tolist()
+        self.vocabulary = {}
+        quantities = menu_df['ingredient_quantities'] if 'ingredient_quantities' in menu_df else [None] * len(menu_df)
+
+        columns, amounts, row_lengths = [], [], []
+        for ingredients, dish_quantities in zip(menu_df['ingredients'], quantities):
+            dish_quantities = {k.strip().lower(): v for k, v in (dish_quantities or {}).items()} \
+                if isinstance(dish_quantities, dict) else {}
+            required = list(dict.fromkeys(split_ingredients(ingredients)))
+            for ingredient in required:
+                columns.append(self.vocabulary.setdefault(ingredient, len(self.vocabulary)))
+                amounts.append(standardize_amount(dish_quantities.get(ingredient, 0)))
+            row_lengths.append(len(required))
+
+        self.columns = np.asarray(columns, dtype=np.int64)
+        self.amounts = np.asarray(amounts, dtype=float)
+        self.row_lengths = np.asarray(row_lengths, dtype=np.int64)
+        self.row_starts = np.concatenate(([0], np.cumsum(self.row_lengths)[:-1])).astype(np.int64)
+
+    # Stock vector aligned with the ingredient vocabulary
+    def stock_vector(self, stock):
+        stock = pd.Series(stock, dtype=float)
+        return stock.reindex(pd.Index(list(self.vocabulary)), fill_value=0.0).fillna(0.0).to_numpy()
+
+    # stock / amount per recipe line; lines without an amount are unlimited
+    # while the ingredient is in stock
+    def line_ratios(self, stock):
+        available = self.stock_vector(stock)[self.columns]
+        ratios = np.full(len(self.columns), np.inf)
+        np.divide(available, self.amounts, out=ratios, where=self.amounts > 0)
+        ratios[available <= 0] = 0
+        return ratios
+
+    # Reduce per-line values to one value per dish; dishes without lines get `empty`
+    def per_dish(self, line_values, reduce, empty):
+        result = np.full(len(self.dish_names), empty, dtype=float)
+        has_lines = self.row_lengths > 0
+        if has_lines.any():
+            result[has_lines] = reduce.reduceat(np.asarray(line_values, dtype=float), self.row_starts[has_lines])
+        return result
+
+    # Whole servings each dish supports: min over its recipe lines of stock / amount
+    def servings(self, stock):
+        if not len(self.columns):
+            return np.full(len(self.dish_names), np.inf)
+        return np.floor(self.per_dish(self.line_ratios(stock), np.minimum, np.inf))
+
+    # Dish names (menu order) with at least min_servings servings in stock
+    def dishes_with_servings(self, stock, min_servings=1):
+        servings = self.servings(stock)
+        return [name for name, count in zip(self.dish_names, servings) if count >= min_servings]
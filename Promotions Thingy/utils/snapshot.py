@@ -0,0 +1,133 @@
+import threading
+import time
+
+import pandas as pd
+
+from utils.telemetry import span
+
+# Seconds before a snapshot without a live listener is re-read
+SNAPSHOT_TTL_SECONDS = 300
+
+# Seconds to wait for the listener's first callback before reading directly
+LISTENER_SEED_TIMEOUT = 10
+
+_snapshots = {}
+_registry_lock = threading.Lock()
+
+# Process-wide in-memory copy of a Firestore collection.
+# Seeded by the first on_snapshot callback and kept current by later ones;
+# if the listener can't start or dies, reads fall back to a full stream()
+# once the copy is older than the TTL.
+class CollectionSnapshot:
+    def __init__(self, db, collection, ttl=SNAPSHOT_TTL_SECONDS):
+        self.db = db
+        self.collection = collection
+        self.ttl = ttl
+        self.docs = {}
+        self.version = 0
+        self.loaded_at = 0.0
+        self._lock = threading.RLock()
+        self._seeded = threading.Event()
+        self._watch = None
+        self._derived = {}
+        self._started = False
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        try:
+            self._watch = self.db.collection(self.collection).on_snapshot(self._on_snapshot)
+        except Exception:
+            self._watch = None
+        if not (self._watch and self._seeded.wait(LISTENER_SEED_TIMEOUT)):
+            self.refresh()
+        return self
+
+    # Start once; sessions that race the first start wait on this snapshot
+    # alone, never on other collections or outlets
+    def ensure_started(self):
+        with self._start_lock:
+            if not self._started:
+                self.start()
+                self._started = True
+        return self
+
+    def _on_snapshot(self, documents, changes, read_time):
+        with self._lock:
+            if not self._seeded.is_set():
+                self.docs = {doc.id: doc.to_dict() for doc in documents}
+            else:
+                for change in changes:
+                    if change.type.name == 'REMOVED':
+                        self.docs.pop(change.document.id, None)
+                    else:
+                        self.docs[change.document.id] = change.document.to_dict()
+            self._bump()
+        self._seeded.set()
+
+    # Full collection read, used for seeding without a listener and as the TTL fallback
+    def refresh(self):
+        with span("firestore.snapshot_read", collection=self.collection) as fields:
+            docs = {doc.id: doc.to_dict() for doc in self.db.collection(self.collection).stream()}
+            fields["docs"] = len(docs)
+        with self._lock:
+            self.docs = docs
+            self._bump()
+        self._seeded.set()
+
+    def _bump(self):
+        self.version += 1
+        self.loaded_at = time.time()
+        self._derived = {}
+
+    def listening(self):
+        return self._watch is not None and getattr(self._watch, 'is_active', True)
+
+    def _ensure_fresh(self):
+        if not self.listening() and time.time() - self.loaded_at > self.ttl:
+            self.refresh()
+
+    # Shared DataFrame of the current docs; callers must not mutate it
+    def frame(self):
+        self._ensure_fresh()
+        with self._lock:
+            return self._frame()
+
+    def _frame(self):
+        if 'frame' not in self._derived:
+            self._derived['frame'] = pd.DataFrame(list(self.docs.values()))
+        return self._derived['frame']
+
+    # Value built from the frame once per snapshot version (e.g. a DishIndex)
+    def derived(self, key, build):
+        self._ensure_fresh()
+        with self._lock:
+            if key not in self._derived:
+                self._derived[key] = build(self._frame())
+            return self._derived[key]
+
+    def close(self):
+        if self._watch is not None:
+            self._watch.unsubscribe()
+            self._watch = None
+
+# Shared snapshot for a collection (per outlet for outlet-scoped clients),
+# started on first use. The registry lock only guards the lookup; the
+# first read runs outside it.
+def get_snapshot(db, collection, ttl=SNAPSHOT_TTL_SECONDS):
+    key = (getattr(db, "outlet", None), collection)
+    replaced = None
+    with _registry_lock:
+        snapshot = _snapshots.get(key)
+        if snapshot is None or snapshot.db is not db:
+            replaced = snapshot
+            snapshot = _snapshots[key] = CollectionSnapshot(db, collection, ttl)
+    if replaced is not None:
+        replaced.close()
+    return snapshot.ensure_started()
+
+# Stop every listener, e.g. before re-initializing Firestore
+def close_snapshots():
+    with _registry_lock:
+        for snapshot in _snapshots.values():
+            snapshot.close()
+        _snapshots.clear()
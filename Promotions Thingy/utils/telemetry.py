@@ -0,0 +1,89 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+# Recent spans kept per stage; set TELEMETRY_EXPORT_PATH to also append
+# every span to a JSON lines file
+TELEMETRY_BUFFER_SIZE = int(os.environ.get("TELEMETRY_BUFFER_SIZE", 500))
+TELEMETRY_EXPORT_PATH = os.environ.get("TELEMETRY_EXPORT_PATH", "")
+
+# Numeric span fields averaged per stage in the summary
+SUMMARY_FIELDS = ("prompt_tokens", "output_tokens", "items", "writes", "docs")
+
+_telemetry = None
+_telemetry_lock = threading.Lock()
+
+# In-process ring buffer of recent span timings, one deque per stage
+class Telemetry:
+    def __init__(self, size=TELEMETRY_BUFFER_SIZE, export_path=TELEMETRY_EXPORT_PATH):
+        self.size = size
+        self.export_path = export_path
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds, **fields):
+        event = {"stage": stage, "seconds": seconds, "at": time.time(), **fields}
+        with self._lock:
+            if stage not in self._stages:
+                self._stages[stage] = deque(maxlen=self.size)
+            self._stages[stage].append(event)
+            if self.export_path:
+                with open(self.export_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(event, default=str) + "\n")
+
+    # Time a block; the yielded dict can be filled with extra fields
+    # (e.g. token counts) and the exception type is kept on failure
+    @contextmanager
+    def span(self, stage, **fields):
+        start = time.perf_counter()
+        try:
+            yield fields
+        except BaseException as exc:
+            fields["error"] = type(exc).__name__
+            raise
+        finally:
+            self.record(stage, time.perf_counter() - start, **fields)
+
+    def events(self, stage):
+        with self._lock:
+            return list(self._stages.get(stage, ()))
+
+    # One row per stage: call and error counts, latency percentiles in ms
+    # and the mean of any numeric SUMMARY_FIELDS the spans carried
+    def summary(self):
+        with self._lock:
+            stages = {stage: list(events) for stage, events in self._stages.items()}
+        rows = []
+        for stage, events in sorted(stages.items()):
+            p50, p95, p99 = np.percentile([event["seconds"] for event in events], [50, 95, 99]) * 1000
+            row = {"stage": stage, "calls": len(events), "errors": sum("error" in event for event in events),
+                   "p50_ms": p50, "p95_ms": p95, "p99_ms": p99}
+            for field in SUMMARY_FIELDS:
+                values = [event[field] for event in events if isinstance(event.get(field), (int, float))]
+                if values:
+                    row[f"avg_{field}"] = sum(values) / len(values)
+            rows.append(row)
+        return rows
+
+    def clear(self):
+        with self._lock:
+            self._stages.clear()
+
+# Process-wide telemetry buffer
+def get_telemetry():
+    global _telemetry
+    with _telemetry_lock:
+        if _telemetry is None:
+            _telemetry = Telemetry()
+        return _telemetry
+
+def span(stage, **fields):
+    return get_telemetry().span(stage, **fields)
+
+def record(stage, seconds, **fields):
+    get_telemetry().record(stage, seconds, **fields)